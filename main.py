@@ -27,18 +27,18 @@ class CryptoMarketBot:
             print("\n=== 开始数据收集 ===")
             print(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
-            # 1. 爬取市场新闻
-            print("\n1. 爬取市场分析帖子...")
-            self.crawler.crawl_market_news()
+            # 1. 并行爬取各数据源的帖子和文章
+            print("\n1. 爬取市场分析帖子和文章...")
+            self.crawler.crawl_sources()
             
-            # 2. 爬取文章
-            print("\n2. 爬取市场分析文章...")
-            self.crawler.crawl_articles()
-            
-            # 3. 爬取价格数据
-            print("\n3. 爬取BTC价格数据...")
+            # 2. 获取价格数据
+            print("\n2. 获取价格数据...")
             self.crawler.crawl_price_data()
             
+            # 3. 计算技术指标
+            print("\n3. 计算技术指标...")
+            self.crawler.crawl_technical_indicators()
+            
             print("\n数据收集完成！")
             return True
             
@@ -52,13 +52,13 @@ class CryptoMarketBot:
             print("\n=== 开始数据分析 ===")
             print(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
-            # 运行市场分析
-            self.analyzer.run_analysis()
-            
-            # 生成投资建议
-            print("\n生成投资建议...")
-            result = self.analyzer.generate_investment_recommendation()
+            # 并行分析文章和帖子，完成后生成投资建议
+            stages = self.analyzer.run_analysis(recommend=True)
+            for name in ("articles", "posts", "recommendation"):
+                print(f"{name}: {stages[name]['status']} ({stages[name]['seconds']}秒)")
+            print(f"分析总耗时: {stages['total_seconds']}秒")
             
+            result = stages["recommendation"]["result"] or {"status": "error", "message": "生成投资建议失败"}
             if result["status"] == "success":
                 print("投资建议生成成功！")
                 return True
@@ -1,14 +1,19 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 import os
 from services.crawler import FinancialDataCrawler
 from services.analyzer import MarketAnalyzer
 from services.BinancePublisher import BinancePublisher
 from services.WXPublisher import WXPublisher
+from services.price_history import PriceHistory, RESOLUTIONS
 from datetime import datetime
 import json
 import subprocess
 import time
 import asyncio
+import queue
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 # 启动调试模式的Chrome
 # chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
@@ -21,6 +26,51 @@ app = Flask(__name__)
 analyzer = MarketAnalyzer()
 binance_publisher = BinancePublisher()
 wx_publisher = WXPublisher()
+# 爬取任务串行执行，避免多个请求同时启动浏览器工作进程池
+crawl_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crawler")
+price_history = PriceHistory(os.getenv('DATA_SAVE_PATH', './data'))
+
+def _run_crawl():
+    crawler = FinancialDataCrawler()
+    sources = crawler.crawl_sources()
+    crawler.crawl_price_data()
+    crawler.crawl_technical_indicators()
+    return {"sources": sources}
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _stream_task(task):
+    """在后台线程执行 task(on_token)，把模型输出逐段以SSE事件转发给页面
+
+    页面断开连接时任务继续执行，最终结果照常写入JSON文件。
+    """
+    events = queue.Queue()
+
+    def run():
+        try:
+            result = task(lambda stage, text: events.put(("token", {"stage": stage, "text": text})))
+            events.put(("done", result))
+        except Exception as e:
+            events.put(("failed", {"message": str(e)}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, daemon=True, name="analysis-stream").start()
+
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=15)
+            except queue.Empty:
+                yield ": keep-alive\n\n"  # 防止代理因长时间无数据断开连接
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route('/')
 def index():
@@ -29,21 +79,24 @@ def index():
 @app.route('/api/crawl', methods=['POST'])
 def crawl():
     try:
-        crawler = FinancialDataCrawler()
-        crawler.crawl_market_news()
-        crawler.crawl_articles()
-        return jsonify({"status": "success", "message": "爬取完成"})
+        stats = crawl_executor.submit(_run_crawl).result()
+        return jsonify({"status": "success", "message": "爬取完成", "stats": stats})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
     try:
-        analyzer.run_analysis()
-        return jsonify({"status": "success", "message": "分析完成"})
+        stages = analyzer.run_analysis(use_cache=not request.args.get('refresh'))
+        return jsonify({"status": "success", "message": "分析完成", "stages": stages})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
 
+@app.route('/api/analyze/stream', methods=['GET'])
+def analyze_stream():
+    use_cache = not request.args.get('refresh')
+    return _stream_task(lambda on_token: analyzer.run_analysis(use_cache=use_cache, on_token=on_token))
+
 @app.route('/api/results', methods=['GET'])
 def get_results():
     try:
@@ -63,6 +116,31 @@ def get_results():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
 
+@app.route('/api/prices/<symbol>', methods=['GET'])
+def get_prices(symbol):
+    try:
+        resolution = request.args.get('resolution', '1h')
+        if resolution not in RESOLUTIONS:
+            return jsonify({"status": "error", "message": f"不支持的周期: {resolution}"})
+        bars = price_history.bars(
+            symbol,
+            resolution,
+            start=request.args.get('start', type=int),
+            end=request.args.get('end', type=int),
+            limit=request.args.get('limit', 500, type=int)
+        )
+        return jsonify({
+            "status": "success",
+            "data": {
+                "symbol": symbol.upper(),
+                "resolution": resolution,
+                "columns": list(bars.dtype.names),
+                "bars": bars.tolist()
+            }
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)})
+
 @app.route('/api/update_analysis', methods=['POST'])
 def update_analysis():
     try:
@@ -80,7 +158,7 @@ def update_analysis():
 @app.route('/api/generate_recommendation', methods=['POST'])
 def generate_recommendation():
     try:
-        result = analyzer.generate_investment_recommendation()
+        result = analyzer.generate_investment_recommendation(use_cache=not request.args.get('refresh'))
         return jsonify(result)
     except Exception as e:
         return jsonify({
@@ -88,6 +166,13 @@ def generate_recommendation():
             "message": str(e)
         })
 
+@app.route('/api/generate_recommendation/stream', methods=['GET'])
+def generate_recommendation_stream():
+    use_cache = not request.args.get('refresh')
+    return _stream_task(lambda on_token: analyzer.generate_investment_recommendation(
+        use_cache=use_cache, on_token=partial(on_token, "recommendation")
+    ))
+
 @app.route('/api/push_to_binance', methods=['POST'])
 def push_to_binance():
     try:
@@ -22,18 +22,16 @@ class CryptoAnalysisBot:
             print(f"开始分析任务 - {datetime.now()}")
             
             # 1. 收集数据
-            self.crawler.crawl_market_news()
-            self.crawler.crawl_articles() 
+            self.crawler.crawl_sources()
+            self.crawler.crawl_price_data()
+            self.crawler.crawl_technical_indicators()
             
-            # 2. AI分析
-            self.analyzer.analyze_articles()
-            self.analyzer.analyze_posts()
-           
-            
-            # 3. 生成报告
-            self.analyzer.generate_investment_recommendation()
+            # 2. AI分析：文章和帖子并行分析，完成后生成报告
+            stages = self.analyzer.run_analysis(recommend=True)
+            for name in ("articles", "posts", "recommendation"):
+                print(f"{name}: {stages[name]['status']} ({stages[name]['seconds']}秒)")
         
-            # 4. 发布到Binance Square
+            # 3. 发布到Binance Square
             self.publisher.push_recommendation()
             
             print(f"分析任务完成 - {datetime.now()}")
@@ -4,6 +4,7 @@ import logging
 from datetime import datetime, timedelta
 import requests
 from typing import Optional, Dict, Any
+from .image_cache import ImageCache
 
 # 配置日志
 logging.basicConfig(
@@ -39,6 +40,9 @@ class WXPublisher:
         self.app_secret: Optional[str] = None
         self.config_manager = ConfigManager.get_instance()
         self.data_path = os.getenv('DATA_SAVE_PATH', './data')
+        # 图片按内容缓存在本地，重复推送时不再重新下载
+        self.image_cache = ImageCache.get_instance()
+        self.default_cover_url = os.getenv('WEIXIN_DEFAULT_COVER_URL', "https://gips0.baidu.com/it/u=1690853528,2506870245&fm=3028&app=3028&f=JPEG&fmt=auto?w=1024&h=1024")
 
     async def refresh(self) -> None:
         """刷新配置信息"""
@@ -107,13 +111,13 @@ class WXPublisher:
         if not image_url:
             return "SwCSRjrdGJNaWioRQUHzgF68BHFkSlb_f5xlTquvsOSA6Yy0ZRjFo0aW9eS3JJu_"
 
-        image_content = requests.get(image_url).content
+        image_content, content_type = self.image_cache.get_bytes(image_url)
         token = await self.ensure_access_token()
         url = f"https://api.weixin.qq.com/cgi-bin/material/add_material?access_token={token}&type=image"
 
         try:
             files = {
-                'media': ('image.jpg', image_content, 'image/jpeg')
+                'media': ('image.jpg', image_content, content_type)
             }
             response = requests.post(url, files=files).json()
 
@@ -136,12 +140,12 @@ class WXPublisher:
 
         try:
             if image_buffer:
-                image_content = image_buffer
+                image_content, content_type = image_buffer, 'image/jpeg'
             else:
-                image_content = requests.get(image_url).content
+                image_content, content_type = self.image_cache.get_bytes(image_url)
 
             files = {
-                'media': ('image.jpg', image_content, 'image/jpeg')
+                'media': ('image.jpg', image_content, content_type)
             }
             response = requests.post(url, files=files).json()
 
@@ -221,7 +225,7 @@ class WXPublisher:
             
             logger.info(f"上传图片: {image_url}")
             # 上传图片
-            media_id = await self.upload_image("https://gips0.baidu.com/it/u=1690853528,2506870245&fm=3028&app=3028&f=JPEG&fmt=auto?w=1024&h=1024")
+            media_id = await self.upload_image(image_url or self.default_cover_url)
             logger.info(f"上传图片成功: {media_id}")
             # 推送到微信公众号
             return await self.publish(
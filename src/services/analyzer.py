@@ -1,10 +1,19 @@
 import os
 import json
+import time
+import threading
 import openai
 import logging
 from datetime import datetime
-import requests
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from .jsonl_store import iter_jsonl
+from .indicators import format_indicators
+from .dedup import Deduplicator
+from .llm_client import LLMClient, LLMError
+from .llm_cache import LLMCache, prompt_fingerprint
+from .prompt_builder import PromptBuilder
 
 # 配置日志
 logging.basicConfig(
@@ -20,6 +29,25 @@ openai.api_base = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
 openai.api_model = os.getenv('MODEL', 'gpt-4o')
 openai.api_temperature = os.getenv('PREDICTION_THRESHOLD', 0.75)
 
+# 记录上一份报告覆盖了哪些帖子（post_id）和文章（URL），用于增量分析
+COVERAGE_FILE = "analysis_coverage.json"
+
+# 各类报告的结果文件和提示词中的数据说明
+REPORTS = {
+    "articles": {
+        "file": "article_analysis.json",
+        "label": "文章",
+        "direct": "文章列表（每行一篇，dup 为该内容被重复发布的次数，过长的正文以…截断）",
+        "partial": "各批文章的分析要点（请综合为一份完整报告，情绪和关注点按各批的条数加权）",
+    },
+    "posts": {
+        "file": "post_analysis.json",
+        "label": "社区帖子",
+        "direct": "帖子列表（每行一条，dup 为该内容被重复发布的次数，reactions 为表情互动总数）",
+        "partial": "各批帖子的分析要点（请综合为一份完整报告，情绪、话题热度和词频按各批的条数加权）",
+    },
+}
+
 class MarketAnalyzer:
     def __init__(self):
         # 先加载环境变量
@@ -33,10 +61,31 @@ class MarketAnalyzer:
         self.api_temperature = float(os.getenv('PREDICTION_THRESHOLD', '0.75'))  # 转换为浮点数
 
         logger.info(f"API Base URL: {self.api_base}")  # 调试信息
+        # 复用连接并带超时和退避重试的大模型客户端，记录每次调用的耗时和token用量
+        self.llm = LLMClient(self.api_base, self.api_key)
+        # 输入未变化时直接返回上次的模型输出
+        self.llm_cache = LLMCache(self.data_path)
+        # 帖子/文章按模型的token预算压缩后写入提示词
+        self.prompt_builder = PromptBuilder(self.api_model)
+        self.prompt_stats = {}
+        # 超出token预算时分批并发提炼要点（map），再按原报告格式合并（reduce）；auto/true/false
+        self.map_reduce = os.getenv('ANALYSIS_MAP_REDUCE', 'auto').lower()
+        self.chunk_tokens = int(os.getenv('ANALYSIS_CHUNK_TOKENS', '6000'))
+        self.max_inflight = int(os.getenv('ANALYSIS_MAX_INFLIGHT', '4'))
+        # 增量分析：只发送上一份报告未覆盖的新条目和上一份报告的摘要，定期重新全量分析
+        self.delta_enabled = os.getenv('ANALYSIS_DELTA', 'true').lower() == 'true'
+        self.full_interval = float(os.getenv('ANALYSIS_FULL_INTERVAL', '24')) * 3600
+        self.delta_max_ratio = float(os.getenv('ANALYSIS_DELTA_MAX_RATIO', '0.5'))
+        self.delta_summary_tokens = int(os.getenv('ANALYSIS_DELTA_SUMMARY_TOKENS', '1500'))
+        self._coverage_lock = threading.Lock()
 
         self.data_dir = 'data'
         os.makedirs(self.data_dir, exist_ok=True)
 
+        # 分析前合并重复和近似重复的帖子/文章，减少提示词长度
+        self.dedup_enabled = os.getenv('ANALYSIS_DEDUP', 'true').lower() == 'true'
+        self.deduplicator = Deduplicator(threshold=float(os.getenv('DEDUP_THRESHOLD', '0.8')))
+
     def _load_json(self, filename):
         """加载JSON文件"""
         filepath = os.path.join(self.data_path, filename)
@@ -45,19 +94,46 @@ class MarketAnalyzer:
                 return json.load(f)
         return []
 
+    def _iter_records(self, filename):
+        """流式读取爬虫保存的JSONL数据，不存在时兼容旧的JSON数组文件"""
+        filepath = os.path.join(self.data_path, filename)
+        if os.path.exists(filepath):
+            yield from iter_jsonl(filepath)
+        else:
+            yield from self._load_json(os.path.splitext(filename)[0] + ".json")
+
+    def _load_crawled(self, merged_file, legacy_file):
+        """优先读取多数据源的合并结果，不存在时读取原来的单一数据源文件"""
+        if os.path.exists(os.path.join(self.data_path, merged_file)):
+            return list(self._iter_records(merged_file))
+        return list(self._iter_records(legacy_file))
+
+    def _dedupe(self, items, label):
+        """合并重复条目，保留的条目带有 duplicate_count"""
+        if not self.dedup_enabled or not items:
+            return items
+        unique_items = self.deduplicator.run(items)
+        logger.info("%s去重: %d -> %d", label, len(items), len(unique_items))
+        return unique_items
+
+    def _indicator_context(self):
+        """读取爬虫计算的技术指标，压缩为提示词中的数值行"""
+        snapshots = self._load_json("technical_indicators.json")
+        if not snapshots:
+            return "（暂无技术指标数据）"
+        return format_indicators(snapshots)
+
     def _save_json(self, data, filename):
         """保存JSON文件"""
         filepath = os.path.join(self.data_path, filename)
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
-    def _call_ai_api(self, prompt):
-        """调用AI API"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+    def _call_ai_api(self, prompt, use_cache=True, on_token=None):
+        """调用AI API；use_cache 为假时跳过缓存重新生成（结果仍会写入缓存）
 
+        传入 on_token 时以流式请求，每收到一段文本调用一次 on_token，仍返回完整文本。
+        """
         data = {
             "model": self.api_model,
             "messages": [
@@ -67,30 +143,201 @@ class MarketAnalyzer:
             "temperature": float(self.api_temperature)
         }
 
+        cache_key = prompt_fingerprint(data["model"], data["temperature"], data["messages"])
+        if use_cache and self.llm_cache.enabled:
+            content = self.llm_cache.get(cache_key)
+            if content is not None:
+                logger.info("命中大模型响应缓存: %s", cache_key[:12])
+                if on_token:
+                    on_token(content)
+                return content
+        elif self.llm_cache.enabled:
+            self.llm_cache.record_bypass()
+
         logger.debug("API请求参数：%s", json.dumps(data, ensure_ascii=False, indent=2))  # 调试信息
+        logger.info("提示词约 %d tokens", self.prompt_builder.count(prompt))
 
         try:
-            response = requests.post(
-                f"{self.api_base}/chat/completions",
-                headers=headers,
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
-        except requests.exceptions.HTTPError as e:
-            logger.error("HTTP错误: %s", e)
-            logger.error("响应内容: %s", e.response.text)  # 打印详细错误信息
+            if on_token:
+                parts = []
+                for text in self.llm.chat_stream(data):
+                    parts.append(text)
+                    on_token(text)
+                content, usage = "".join(parts), None
+            else:
+                response = self.llm.chat(data)
+                content, usage = response["choices"][0]["message"]["content"], response.get("usage")
+            if self.llm_cache.enabled and content:
+                self.llm_cache.put(cache_key, content, {"model": data["model"], "usage": usage})
+            return content
+        except LLMError as e:
+            logger.error("AI API请求失败: %s", e)  # 包含状态码和响应内容
             return None
         except Exception as e:
             logger.error("调用AI API出错: %s", e)
             return None
 
-    def analyze_articles(self):
+    def _map_prompt(self, label, chunk, index, total):
+        """分批分析时单个批次的提示词，只要求提炼要点"""
+        return f"""
+        以下是加密货币{label}数据的第{index}/{total}批（每行一条JSON，dup 为该内容被重复发布的次数）。
+        请提炼这一批的要点，用简洁的Markdown列表输出，不超过500字：
+        - 总体情绪（看涨/看跌/中性）及情绪指数（1-10），列出主要依据
+        - 主要话题/关注点及提及次数
+        - 提到的价格区间、支撑位、阻力位和关键指标
+        - 值得注意的事件和风险
+
+        数据：
+        {chunk}
+        """
+
+    def _analysis_input(self, items, kind, label, use_cache):
+        """准备报告提示词中的数据部分，返回 (数据片段, 实际写入的条目, 是否为分批要点)
+
+        数据不超过token预算时直接压缩写入；否则按 chunk_tokens 分批，最多
+        max_inflight 个批次并发调用模型提炼要点，报告提示词改为合并这些要点。
+        """
+        records = self.prompt_builder.compact(items, kind)
+        total_tokens = self.prompt_builder.total_tokens(records)
+        if self.map_reduce == "false" or (self.map_reduce == "auto" and total_tokens <= self.prompt_builder.budget):
+            block, self.prompt_stats[kind] = self.prompt_builder.fit(items, kind, records=records)
+            return block, items[:self.prompt_stats[kind]["included"]], False
+
+        chunks = self.prompt_builder.chunks(items, kind, self.chunk_tokens, records=records)
+        prompts = [self._map_prompt(label, chunk, i + 1, len(chunks)) for i, (chunk, _) in enumerate(chunks)]
+        started = datetime.now()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_inflight, len(prompts)))) as executor:
+            partials = list(executor.map(lambda prompt: self._call_ai_api(prompt, use_cache), prompts))
+        failed = sum(1 for partial in partials if not partial)
+        logger.info("%s分批分析: %d 批，失败 %d 批，耗时 %.1f 秒", label, len(chunks), failed,
+                    (datetime.now() - started).total_seconds())
+        if failed == len(partials):
+            return None, [], True
+
+        covered = []
+        offset = 0
+        for (_, size), partial in zip(chunks, partials):
+            if partial:
+                covered.extend(items[offset:offset + size])
+            offset += size
+        block = "\n\n".join(
+            f"### 第{i + 1}批（{size}条）\n{partial.strip()}"
+            for i, ((_, size), partial) in enumerate(zip(chunks, partials)) if partial
+        )
+        self.prompt_stats[kind] = {
+            "items": len(items),
+            "included": len(covered),
+            "chunks": len(chunks),
+            "failed_chunks": failed,
+            "tokens": total_tokens,
+            "reduce_tokens": self.prompt_builder.count(block),
+        }
+        return block, covered, True
+
+    @staticmethod
+    def _coverage_key(kind, item):
+        if kind == "posts":
+            return str(item.get("post_id") or item.get("index"))
+        return item.get("url") or item.get("title")
+
+    def _load_coverage(self):
+        try:
+            return self._load_json(COVERAGE_FILE) or {}
+        except json.JSONDecodeError:
+            return {}
+
+    def _save_coverage(self, update):
+        """合并写入一种数据的覆盖记录；文章和帖子并行分析，读写需要加锁"""
+        with self._coverage_lock:
+            coverage = self._load_coverage()
+            coverage.update(update)
+            self._save_json(coverage, COVERAGE_FILE)
+
+    def _report_summary(self, analysis):
+        """把上一份报告压缩为要点：去掉代码块标记、空行和分析时间，截断到 delta_summary_tokens"""
+        lines = []
+        for line in analysis.splitlines():
+            line = line.strip()
+            if not line or line.startswith("```") or line.startswith("- 分析时间"):
+                continue
+            lines.append(line)
+        return self.prompt_builder.truncate("\n".join(lines), self.delta_summary_tokens)
+
+    def _delta_base(self, kind, items):
+        """判断能否增量分析，可以时返回 (上一份报告, 已覆盖且仍存在的键, 新条目, 上次全量时间)"""
+        if not self.delta_enabled:
+            return None
+        previous = self._load_json(REPORTS[kind]["file"]) or {}
+        coverage = self._load_coverage().get(kind)
+        if not previous.get("analysis") or not coverage:
+            return None
+        if time.time() - coverage.get("full_at", 0) > self.full_interval:
+            logger.info("%s距上次全量分析已超过 %.0f 小时，重新全量分析", REPORTS[kind]["label"], self.full_interval / 3600)
+            return None
+        covered = set(coverage.get("keys", []))
+        current_keys = [self._coverage_key(kind, item) for item in items]
+        new_items = [item for item, key in zip(items, current_keys) if key not in covered]
+        if len(new_items) > self.delta_max_ratio * len(items):
+            logger.info("%s新增 %d/%d 条，超过增量比例，重新全量分析", REPORTS[kind]["label"], len(new_items), len(items))
+            return None
+        return previous["analysis"], covered.intersection(current_keys), new_items, coverage["full_at"]
+
+    def _report_data(self, kind, items, use_cache):
+        """准备报告提示词的数据部分，返回包含 mode/title/block/count/coverage 的字典
+
+        mode 为 full（全量）、delta（上一份报告摘要 + 新条目）或 unchanged（没有新条目，
+        沿用上一份报告，analysis 为其内容）。分批分析全部失败时返回 None。
+        """
+        titles = REPORTS[kind]
+        # 跳过缓存（如接口的 ?refresh=1）时同时强制全量分析
+        delta = self._delta_base(kind, items) if use_cache else None
+        if delta and not delta[2]:
+            logger.info("没有新增%s，沿用上一份报告", titles["label"])
+            return {"mode": "unchanged", "analysis": delta[0]}
+
+        target = delta[2] if delta else items
+        block, covered_items, partial = self._analysis_input(target, kind, titles["label"], use_cache)
+        if block is None:
+            return None
+        covered_keys = {self._coverage_key(kind, item) for item in covered_items}
+        data_title = titles["partial"] if partial else titles["direct"]
+        if not delta:
+            return {
+                "mode": "full",
+                "title": data_title,
+                "block": block,
+                "count": len(covered_items),
+                "coverage": {kind: {"keys": sorted(covered_keys), "full_at": time.time()}},
+            }
+
+        previous_analysis, previous_keys, new_items, full_at = delta
+        logger.info("%s增量分析: 上一份报告覆盖 %d 条，新增 %d 条", titles["label"], len(previous_keys), len(new_items))
+        keys = previous_keys | covered_keys
+        return {
+            "mode": "delta",
+            "title": "上一份报告的要点和新增数据（请在上一份报告的基础上结合新增数据更新报告，保持相同的结构；"
+                     "新增数据不足以改变判断的部分保留原结论）",
+            "block": f"上一份报告（覆盖 {len(previous_keys)} 条）：\n{self._report_summary(previous_analysis)}"
+                     f"\n\n新增{titles['label']}（{len(covered_items)} 条），{data_title}：\n{block}",
+            "count": len(keys),
+            "coverage": {kind: {"keys": sorted(keys), "full_at": full_at}},
+        }
+
+    def analyze_articles(self, use_cache=True, on_token=None):
         """分析文章"""
-        articles = self._load_json("cmc_articles.json")
+        articles = self._dedupe(self._load_crawled("merged_articles.jsonl", "cmc_articles.jsonl"), "文章")
         if not articles:
             logger.warning("没有找到文章数据")
             return
+        report = self._report_data("articles", articles, use_cache)
+        if report is None:
+            logger.error("文章分批分析全部失败")
+            return
+        if report["mode"] == "unchanged":
+            if on_token:
+                on_token(report["analysis"])
+            return report["analysis"]
+        data_title, articles_block, article_count = report["title"], report["block"], report["count"]
 
         # 准备分析提示
         prompt = f"""
@@ -135,31 +382,46 @@ class MarketAnalyzer:
         > 重要风险提示和注意事项
 
         ## 5. 数据来源
-        - 分析文章数量：{len(articles)}
+        - 分析文章数量：{article_count}
         - 分析时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
-        文章列表：
-        {json.dumps(articles, ensure_ascii=False, indent=2)}
+        技术指标（本地根据价格历史计算，支撑位/阻力位请以此为准）：
+        {self._indicator_context()}
+
+        {data_title}：
+        {articles_block}
         """
 
         # 调用AI分析
-        analysis = self._call_ai_api(prompt)
+        analysis = self._call_ai_api(prompt, use_cache, on_token)
         if analysis:
             # 保存分析结果
             result = {
                 "timestamp": datetime.now().isoformat(),
                 "analysis": analysis,
-                "type": "markdown"
+                "type": "markdown",
+                "mode": report["mode"]
             }
             self._save_json(result, "article_analysis.json")
-            logger.info("文章分析完成")
+            self._save_coverage(report["coverage"])
+            logger.info("文章分析完成（%s）", report["mode"])
+        return analysis
 
-    def analyze_posts(self):
+    def analyze_posts(self, use_cache=True, on_token=None):
         """分析帖子"""
-        posts = self._load_json("cmc_btc_analysis.json")
+        posts = self._dedupe(self._load_crawled("merged_posts.jsonl", "cmc_btc_analysis.jsonl"), "帖子")
         if not posts:
             logger.warning("没有找到帖子数据")
             return
+        report = self._report_data("posts", posts, use_cache)
+        if report is None:
+            logger.error("帖子分批分析全部失败")
+            return
+        if report["mode"] == "unchanged":
+            if on_token:
+                on_token(report["analysis"])
+            return report["analysis"]
+        data_title, posts_block, post_count = report["title"], report["block"], report["count"]
 
         # 准备分析提示
         prompt = f"""
@@ -207,36 +469,77 @@ class MarketAnalyzer:
         > 重要风险提示和注意事项
 
         ## 5. 数据来源
-        - 分析帖子数量：{len(posts)}
+        - 分析帖子数量：{post_count}
         - 分析时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
-        帖子列表：
-        {json.dumps(posts, ensure_ascii=False, indent=2)}
+        技术指标（本地根据价格历史计算，支撑位、阻力位和关键指标请以此为准）：
+        {self._indicator_context()}
+
+        {data_title}：
+        {posts_block}
         """
 
         # 调用AI分析
-        analysis = self._call_ai_api(prompt)
+        analysis = self._call_ai_api(prompt, use_cache, on_token)
         if analysis:
             # 保存分析结果
             result = {
                 "timestamp": datetime.now().isoformat(),
                 "analysis": analysis,
-                "type": "markdown"
+                "type": "markdown",
+                "mode": report["mode"]
             }
             self._save_json(result, "post_analysis.json")
-            logger.info("帖子分析完成")
-
-    def run_analysis(self):
-        """运行完整分析"""
-        logger.info("开始分析文章...")
-        self.analyze_articles()
+            self._save_coverage(report["coverage"])
+            logger.info("帖子分析完成（%s）", report["mode"])
+        return analysis
 
-        logger.info("开始分析帖子...")
-        self.analyze_posts()
+    def _timed_stage(self, name, func, *args):
+        """执行一个分析阶段，返回状态和耗时；异常只影响本阶段"""
+        started = time.monotonic()
+        try:
+            result = func(*args)
+            status = "success" if result else "no_result"
+        except Exception as e:
+            logger.error("%s阶段出错: %s", name, e)
+            result, status = None, "error"
+        seconds = round(time.monotonic() - started, 2)
+        logger.info("%s阶段: %s，耗时 %.2f 秒", name, status, seconds)
+        return {"status": status, "seconds": seconds}, result
+
+    def run_analysis(self, use_cache=True, recommend=False, on_token=None):
+        """运行完整分析
+
+        文章和帖子分析相互独立，同时发起；各自成功后立即保存结果，一方失败不影响另一方。
+        recommend 为真时在两者结束后生成投资建议。on_token(阶段, 文本) 接收流式输出。
+        返回各阶段的状态和耗时。
+        """
+        stream = (lambda stage: partial(on_token, stage)) if on_token else (lambda stage: None)
+        started = time.monotonic()
+        logger.info("开始并行分析文章和帖子...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            article_future = executor.submit(self._timed_stage, "文章分析", self.analyze_articles, use_cache,
+                                             stream("articles"))
+            post_future = executor.submit(self._timed_stage, "帖子分析", self.analyze_posts, use_cache,
+                                          stream("posts"))
+            stages = {"articles": article_future.result()[0], "posts": post_future.result()[0]}
+
+        if recommend:
+            if any(stage["status"] != "success" for stage in stages.values()):
+                logger.warning("部分分析未成功，投资建议将使用已有的分析结果")
+            stages["recommendation"], result = self._timed_stage(
+                "投资建议", self.generate_investment_recommendation, use_cache, stream("recommendation")
+            )
+            stages["recommendation"]["result"] = result
+            if result and result.get("status") != "success":
+                stages["recommendation"]["status"] = "error"
 
-        logger.info("分析完成！")
+        stages["total_seconds"] = round(time.monotonic() - started, 2)
+        logger.info("分析完成！各阶段: %s", {name: stage for name, stage in stages.items() if name != "recommendation"})
+        logger.info("大模型调用统计: %s，缓存统计: %s", self.llm.get_stats(), self.llm_cache.get_stats())
+        return stages
 
-    def generate_investment_recommendation(self):
+    def generate_investment_recommendation(self, use_cache=True, on_token=None):
         """生成投资建议"""
         try:
             # 从本地文件读取分析数据
@@ -284,6 +587,9 @@ class MarketAnalyzer:
 社区讨论分析：
 {post_analysis}
 
+技术指标（价格目标和支撑/阻力位请以此为准）：
+{self._indicator_context()}
+
 请生成一份社区交流的帖子，包含以下部分：
 1. 分享您的想法
 
@@ -309,7 +615,7 @@ class MarketAnalyzer:
 请以```markdown开始，以```结束。
 """
             # 调用AI API生成建议
-            recommendation = self._call_ai_api(prompt)
+            recommendation = self._call_ai_api(prompt, use_cache, on_token)
 
             if not recommendation:
                 return {
@@ -0,0 +1,81 @@
+import logging
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger("article-fetcher")
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+DEFAULT_HEADERS = {
+    "User-Agent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class HttpArticleFetcher:
+    """直接请求文章详情页HTML并解析服务端渲染的正文
+
+    使用连接池复用的 requests.Session；正文不在初始HTML中时返回 None，
+    由调用方回退到浏览器标签页。传入 rate_limiter 时请求经过按域名的限速和退避重试。
+    """
+
+    def __init__(self, timeout=15, pool_size=8, rate_limiter=None):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, summary):
+        """获取并解析一篇文章，返回 article_data；无法从HTML中取得正文时返回 None"""
+        url = summary["url"]
+        if self.rate_limiter:
+            response = self.rate_limiter.call(url, lambda: self.session.get(url, timeout=self.timeout))
+        else:
+            response = self.session.get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            logger.debug("文章HTML请求失败 %s: %s", response.status_code, summary["url"])
+            return None
+        return self.parse(response.text, summary)
+
+    def parse(self, html, summary):
+        soup = BeautifulSoup(html, HTML_PARSER)
+        article = soup.select_one("article")
+        if article is None:
+            return None
+
+        content_parts = [
+            text for text in (el.get_text("\n", strip=True) for el in article.select("div.base-text"))
+            if text
+        ]
+        if not content_parts:
+            return None
+
+        title = article.select_one("h1")
+        views = article.select_one("span.article-views")
+        comments = article.select_one("span.article-comments")
+        return {
+            "title": (title.get_text(strip=True) if title else "") or summary["title"],  # 优先使用详情页的标题
+            "author": summary["author"],
+            "date": summary["date"],
+            "content": "\n\n".join(content_parts),
+            "images": [img["src"] for img in article.select("img[src]")],
+            "tags": [text for text in (tag.get_text(strip=True) for tag in article.select("a.article-tag")) if text],
+            "views": views.get_text(strip=True) if views else "0",
+            "comments": comments.get_text(strip=True) if comments else "0",
+            "url": summary["url"],
+            "crawl_time": datetime.now().isoformat(),
+            "fetch_path": "http"
+        }
+
+    def close(self):
+        self.session.close()
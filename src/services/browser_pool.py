@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import atexit
+import logging
+import threading
+import subprocess
+from importlib.metadata import version, PackageNotFoundError
+from contextlib import contextmanager
+import playwright
+from playwright.sync_api import sync_playwright
+
+logger = logging.getLogger("browser-pool")
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+
+# 爬取配置：full 与原来一致，有界面且加载全部资源；lite 无头运行并拦截不需要的资源。
+# 图片只需要 <img src> 中的URL，不需要下载图片内容
+CRAWL_PROFILES = {
+    "full": {
+        "headless": False,
+        "viewport": {'width': 1920, 'height': 1080},
+        "block_resource_types": [],
+        "block_url_patterns": [],
+    },
+    "lite": {
+        "headless": True,
+        "viewport": {'width': 1280, 'height': 800},
+        "block_resource_types": ["image", "media", "font"],
+        "block_url_patterns": [
+            "google-analytics.com",
+            "googletagmanager.com",
+            "doubleclick.net",
+            "googlesyndication.com",
+            "facebook.net",
+            "hotjar.com",
+            "sentry.io",
+            "clarity.ms",
+        ],
+    },
+}
+
+# 被拦截请求的估算大小（字节），请求未发出无法得知实际大小
+ESTIMATED_BYTES = {
+    "image": 60000,
+    "media": 500000,
+    "font": 40000,
+    "script": 30000,
+}
+DEFAULT_ESTIMATED_BYTES = 10000
+
+# 需要检查的浏览器，对应 playwright install chromium 安装的内容
+REQUIRED_BROWSERS = ("chromium", "chromium-headless-shell")
+BROWSER_MARKER_FILE = ".playwright_browsers.json"
+
+_browsers_ok = None  # 本进程内的检查结果，None 表示尚未检查
+
+
+def _browsers_path():
+    """Playwright浏览器的安装目录"""
+    custom_path = os.getenv('PLAYWRIGHT_BROWSERS_PATH')
+    if custom_path and custom_path != '0':
+        return custom_path
+    if sys.platform == 'win32':
+        return os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser('~')), 'ms-playwright')
+    if sys.platform == 'darwin':
+        return os.path.expanduser('~/Library/Caches/ms-playwright')
+    return os.path.join(os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'ms-playwright')
+
+
+def _expected_browser_dirs():
+    """根据当前Playwright版本的 browsers.json 得到应存在的浏览器目录"""
+    browsers_json = os.path.join(os.path.dirname(playwright.__file__), 'driver', 'package', 'browsers.json')
+    with open(browsers_json, 'r', encoding='utf-8') as f:
+        browsers = json.load(f)["browsers"]
+    root = _browsers_path()
+    return [
+        os.path.join(root, f"{browser['name'].replace('-', '_')}-{browser['revision']}")
+        for browser in browsers
+        if browser["name"] in REQUIRED_BROWSERS
+    ]
+
+
+def ensure_browsers_installed(marker_dir):
+    """检查当前版本的浏览器是否已安装，缺失时才执行 playwright install
+
+    检查结果缓存在 marker_dir 下的标记文件中，Playwright版本不变且目录仍存在时
+    直接返回；同一进程内只检查一次。
+    """
+    global _browsers_ok
+    if _browsers_ok is not None:
+        return _browsers_ok
+
+    try:
+        playwright_version = version('playwright')
+    except PackageNotFoundError:
+        playwright_version = 'unknown'
+    marker_path = os.path.join(marker_dir, BROWSER_MARKER_FILE)
+
+    try:
+        with open(marker_path, 'r', encoding='utf-8') as f:
+            marker = json.load(f)
+        if (marker.get("playwright_version") == playwright_version
+                and marker.get("dirs") and all(os.path.isdir(path) for path in marker["dirs"])):
+            _browsers_ok = True
+            return True
+    except (OSError, ValueError):
+        pass
+
+    try:
+        expected_dirs = _expected_browser_dirs()
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("读取Playwright浏览器版本信息失败: %s", e)
+        expected_dirs = []
+
+    if not expected_dirs or not all(os.path.isdir(path) for path in expected_dirs):
+        logger.info("未找到已安装的Playwright浏览器，开始安装chromium...")
+        result = subprocess.run(
+            [sys.executable, '-m', 'playwright', 'install', 'chromium'],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            logger.warning("Playwright浏览器安装可能失败，但仍将尝试继续: %s", result.stderr.strip())
+            # 本进程内不再重复尝试安装，避免每次构造爬虫都阻塞
+            _browsers_ok = False
+            return False
+        try:
+            expected_dirs = _expected_browser_dirs()
+        except (OSError, KeyError, ValueError):
+            expected_dirs = []
+
+    if expected_dirs and all(os.path.isdir(path) for path in expected_dirs):
+        os.makedirs(marker_dir, exist_ok=True)
+        with open(marker_path, 'w', encoding='utf-8') as f:
+            json.dump({"playwright_version": playwright_version, "dirs": expected_dirs}, f, ensure_ascii=False)
+    _browsers_ok = True
+    return True
+
+
+class BrowserPool:
+    """进程内共享的长生命周期浏览器池
+
+    浏览器只在首次使用时启动一次，之后各爬取方法通过 context() 获取独立的上下文。
+    浏览器在服务了 max_pages 个页面后或崩溃断开后会被回收重启。
+
+    注意：Playwright 的同步API绑定在创建它的线程上，因此每个线程持有自己的实例，
+    需要复用浏览器的调用方（如Web服务）应在固定的工作线程中执行爬取。
+    """
+
+    _local = threading.local()
+
+    @classmethod
+    def get_instance(cls):
+        instance = getattr(cls._local, "instance", None)
+        if instance is None:
+            instance = BrowserPool()
+            cls._local.instance = instance
+            atexit.register(instance.close)
+        return instance
+
+    def __init__(self, profile=None, max_pages=None):
+        self.profile_name = profile or os.getenv('CRAWL_PROFILE', 'full')
+        if self.profile_name not in CRAWL_PROFILES:
+            logger.warning("未知的爬取配置 %s，使用 full", self.profile_name)
+            self.profile_name = "full"
+        self.profile = CRAWL_PROFILES[self.profile_name]
+        self.headless = self.profile["headless"]
+        self.max_pages = max_pages or int(os.getenv('BROWSER_MAX_PAGES', '50'))
+        self._playwright = None
+        self._browser = None
+        self._crashed = False
+        self._pages_served = 0
+        self._active_contexts = 0
+        self.stats = {
+            "launches": 0,
+            "reuses": 0,
+            "recycles": 0,
+            "crashes": 0,
+            "contexts": 0,
+            "pages": 0,
+        }
+        self.block_stats = self._empty_block_stats()
+
+    @staticmethod
+    def _empty_block_stats():
+        return {"blocked_requests": 0, "estimated_bytes_saved": 0, "by_type": {}}
+
+    def _launch_browser(self):
+        """启动浏览器，Chromium失败时回退到Firefox"""
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+
+        try:
+            browser = self._playwright.chromium.launch(
+                headless=self.headless,
+                args=['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
+            )
+        except Exception as e:
+            logger.warning("启动Chromium失败，尝试使用Firefox: %s", e)
+            browser = self._playwright.firefox.launch(
+                headless=self.headless,
+                args=['--disable-gpu']
+            )
+
+        browser.on("disconnected", self._on_disconnected)
+        self._browser = browser
+        self._crashed = False
+        self._pages_served = 0
+        self.stats["launches"] += 1
+        logger.info("浏览器已启动 (第 %d 次)", self.stats["launches"])
+        return browser
+
+    def _on_disconnected(self, browser):
+        if browser is self._browser:
+            self._crashed = True
+
+    def _is_healthy(self):
+        return (
+            self._browser is not None
+            and not self._crashed
+            and self._browser.is_connected()
+        )
+
+    def _close_browser(self):
+        if self._browser is None:
+            return
+        try:
+            self._browser.close()
+        except Exception as e:
+            logger.debug("关闭浏览器时出错: %s", e)
+        self._browser = None
+
+    def get_browser(self):
+        """获取可用的浏览器，必要时启动、回收或重启"""
+        if self._browser is not None and not self._is_healthy():
+            logger.warning("浏览器已断开，重新启动")
+            self.stats["crashes"] += 1
+            self._close_browser()
+        elif (self._browser is not None
+              and self._pages_served >= self.max_pages
+              and self._active_contexts == 0):
+            logger.info("浏览器已服务 %d 个页面，回收重启", self._pages_served)
+            self.stats["recycles"] += 1
+            self._close_browser()
+
+        if self._browser is None:
+            return self._launch_browser()
+
+        self.stats["reuses"] += 1
+        return self._browser
+
+    @contextmanager
+    def context(self, **kwargs):
+        """获取一个新的浏览器上下文，退出时自动关闭"""
+        browser = self.get_browser()
+        options = {
+            "viewport": self.profile["viewport"],
+            "user_agent": DEFAULT_USER_AGENT,
+        }
+        options.update(kwargs)
+        context = browser.new_context(**options)
+        context.on("page", self._on_page)
+        if self.profile["block_resource_types"] or self.profile["block_url_patterns"]:
+            context.route("**/*", self._route_request)
+        self._active_contexts += 1
+        self.stats["contexts"] += 1
+        try:
+            yield context
+        finally:
+            self._active_contexts -= 1
+            try:
+                context.close()
+            except Exception as e:
+                logger.debug("关闭浏览器上下文时出错: %s", e)
+
+    def _route_request(self, route):
+        """按资源类型和URL片段拦截请求"""
+        request = route.request
+        resource_type = request.resource_type
+        if (resource_type in self.profile["block_resource_types"]
+                or any(pattern in request.url for pattern in self.profile["block_url_patterns"])):
+            self.block_stats["blocked_requests"] += 1
+            self.block_stats["estimated_bytes_saved"] += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+            by_type = self.block_stats["by_type"]
+            by_type[resource_type] = by_type.get(resource_type, 0) + 1
+            route.abort()
+        else:
+            route.continue_()
+
+    def take_block_stats(self):
+        """返回自上次调用以来拦截的请求数和估算节省的字节数，并清零"""
+        stats = dict(self.block_stats, profile=self.profile_name)
+        self.block_stats = self._empty_block_stats()
+        return stats
+
+    def _on_page(self, page):
+        self._pages_served += 1
+        self.stats["pages"] += 1
+
+    def get_stats(self):
+        """返回浏览器启动/复用统计"""
+        return dict(self.stats, pages_since_launch=self._pages_served)
+
+    def close(self):
+        """关闭浏览器和Playwright"""
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.debug("停止Playwright时出错: %s", e)
+            self._playwright = None
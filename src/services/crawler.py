@@ -1,14 +1,32 @@
-from playwright.sync_api import sync_playwright
 import pandas as pd
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 import json
-from bs4 import BeautifulSoup
 import time
 import sys
-import subprocess
+import atexit
+import threading
+import multiprocessing
+from multiprocessing.util import Finalize
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from .browser_pool import BrowserPool, ensure_browsers_installed
+from .page_waiter import PageWaiter
+from .dom_extract import extract_article
+from .virtual_list import VirtualListHarvester
+from .feed_harvester import FeedHarvester
+from .seen_index import SeenIndex
+from .jsonl_store import JsonlWriter, iter_jsonl, write_jsonl
+from .article_fetcher import HttpArticleFetcher
+from .price_feed import PriceFeed
+from .price_history import PriceHistory
+from .indicators import IndicatorEngine
+from .sources import load_sources, MERGED_FILES
+from .rate_limiter import HostRateLimiter
+from .image_cache import ImageCache
 
 # 设置默认编码为UTF-8
 if sys.platform == 'win32':
@@ -17,8 +35,13 @@ if sys.platform == 'win32':
 
 load_dotenv()
 
+# 帖子和文章以追加写入的JSONL保存，每条记录一行
+POSTS_FILE = "cmc_btc_analysis.jsonl"
+ARTICLES_FILE = "cmc_articles.jsonl"
+
 class FinancialDataCrawler:
     def __init__(self):
+        started = time.monotonic()
         self.data_path = os.getenv('DATA_SAVE_PATH', './data')
         os.makedirs(self.data_path, exist_ok=True)
         self.cmc_url = "https://coinmarketcap.com/community/topics/BTC%20Price%20Analysis%23/latest/"
@@ -26,23 +49,42 @@ class FinancialDataCrawler:
         self._ensure_playwright_browsers()
         self.max_retries = 3
         self.timeout = 60000  # 增加超时时间到60秒
+        # 进程内共享的浏览器池，避免每次爬取都冷启动浏览器
+        self.browser_pool = BrowserPool.get_instance()
+        # 文章详情并发抓取配置
+        self.article_concurrency = int(os.getenv('ARTICLE_CONCURRENCY', '4'))
+        # 进程内共享的按域名限速器，负责请求节奏和页面级的退避重试
+        self.rate_limiter = HostRateLimiter.get_instance()
+        # 文章详情优先直接请求HTML，正文不在初始HTML中时才打开浏览器标签页
+        self.article_http_first = os.getenv('ARTICLE_HTTP_FIRST', 'true').lower() == 'true'
+        self.http_fetcher = HttpArticleFetcher(pool_size=self.article_concurrency, rate_limiter=self.rate_limiter)
+        self.article_fetch_stats = {"http": 0, "browser": 0}
+        # 基于页面信号的等待，替代固定sleep
+        self.waiter = PageWaiter()
+        # 社区信息流的XHR接口，用于判断网络是否静默和拦截接口数据
+        self.feed_api_patterns = os.getenv('CRAWL_FEED_PATTERNS', 'api-gravity.coinmarketcap.com').split(',')
+        # 采集模式：feed 优先从信息流接口响应中解码，未捕获到时回退到DOM；dom 只使用DOM
+        self.harvest_mode = os.getenv('CRAWL_HARVEST_MODE', 'feed')
+        # 增量爬取：遇到已抓取且内容未变化的条目即停止
+        self.incremental = os.getenv('CRAWL_INCREMENTAL', 'true').lower() == 'true'
+        # 合并后把帖子和文章中的图片缓存到本地，发布时直接复用
+        self.cache_images = os.getenv('CRAWL_CACHE_IMAGES', 'false').lower() == 'true'
+        self.seen_index = SeenIndex(self.data_path)
+        # 价格直接从JSON行情接口批量获取，不再打开浏览器
+        self.price_feed = PriceFeed()
+        self.price_symbols = [s.strip().upper() for s in os.getenv('PRICE_SYMBOLS', 'BTC,ETH,BNB').split(',') if s.strip()]
+        # 价格历史按币种保存为列式数组，并增量生成1m/1h/1d K线
+        self.price_history = PriceHistory(self.data_path)
+        self.indicator_engine = IndicatorEngine(self.price_history, os.getenv('INDICATOR_RESOLUTION', '1h'))
+        # 文章详情提取模式：batch 为单次evaluate批量提取，element 为逐元素提取
+        self.extraction_mode = os.getenv('CRAWL_EXTRACTION_MODE', 'batch')
+        self.init_seconds = time.monotonic() - started
+        print(f"爬虫初始化耗时 {self.init_seconds:.3f} 秒")
 
     def _ensure_playwright_browsers(self):
-        """确保Playwright浏览器已安装"""
+        """确保Playwright浏览器已安装（按磁盘上的浏览器版本检查，结果缓存在标记文件中）"""
         try:
-            result = subprocess.run(
-                ['python', '-m', 'playwright', 'install', 'chromium'],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode != 0:
-                print("使用python -m playwright install失败，尝试其他方式...")
-                result = subprocess.run(
-                    ['playwright', 'install', 'chromium'],
-                    capture_output=True,
-                    text=True
-                )
-            if result.returncode != 0:
+            if not ensure_browsers_installed(self.data_path):
                 print("警告：Playwright浏览器安装可能失败，但仍将尝试继续...")
         except Exception as e:
             print(f"Playwright浏览器安装过程中出错: {e}")
@@ -51,229 +93,89 @@ class FinancialDataCrawler:
     def wait_for_page_load(self, page):
         """等待页面加载完成"""
         try:
-            # 等待页面加载
-            page.wait_for_load_state("networkidle", timeout=self.timeout)
             # 等待主要内容加载
             page.wait_for_selector("div[class*='post-content']", timeout=self.timeout)
-            # 额外等待以确保动态内容加载
-            time.sleep(5)
+            # 等待信息流接口请求结束，且首条帖子文本渲染稳定
+            self.waiter.wait_for_network_quiet(page)
+            self.waiter.wait_for_text_stable(page, "div[class*='post-content']", timeout=5000)
         except PlaywrightTimeoutError:
             print("页面加载超时，但将继续尝试获取内容...")
 
-    def scroll_until_enough_posts(self, page, target_count=20):
-        """滚动直到获取足够数量的帖子或没有更多内容"""
-        try:
-            # 获取初始帖子数量
-            post_elements = page.query_selector_all("div[class*='post-content']")
-            current_count = len(post_elements)
-            print(f"初始加载了 {current_count} 条帖子")
-            
-            # 记录最后一个帖子的data-index
-            last_index = None
-            if post_elements:
-                last_post = post_elements[-1]
-                last_index = last_post.get_attribute("data-index")
-            
-            # 如果初始数量不足，尝试滚动加载
-            while current_count < target_count:
-                # 滚动到底部
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(10)  # 增加等待时间到10秒
-                
-                # 等待新内容加载
-                try:
-                    # 等待新帖子出现（通过data-index判断）
-                    page.wait_for_function("""
-                        () => {
-                            const posts = document.querySelectorAll("div[class*='post-content']");
-                            if (posts.length === 0) return false;
-                            
-                            const lastPost = posts[posts.length - 1];
-                            const currentIndex = lastPost.getAttribute('data-index');
-                            
-                            return currentIndex !== arguments[0];
-                        }
-                    """, last_index, timeout=10000)
-                except PlaywrightTimeoutError:
-                    print("等待新内容加载超时")
-                    break
-                
-                # 获取所有帖子
-                new_elements = page.query_selector_all("div[class*='post-content']")
-                new_count = len(new_elements)
-                
-                if new_count > current_count:
-                    print(f"加载了 {new_count - current_count} 条新帖子")
-                    current_count = new_count
-                    post_elements = new_elements
-                    
-                    # 更新最后一个帖子的data-index
-                    last_post = post_elements[-1]
-                    last_index = last_post.get_attribute("data-index")
-                    print(f"last_index {last_index}")
-                    
-                    # 确保新加载的内容完全渲染
-                    time.sleep(2)
-                    
-                    # 检查新加载的帖子是否有内容
-                    for i in range(current_count - new_count):
-                        new_post = post_elements[-(i+1)]
-                        content = new_post.inner_text().strip()
-                        if not content:
-                            print(f"新加载的第 {i+1} 条帖子内容为空，等待更长时间...")
-                            time.sleep(3)
-                            content = new_post.inner_text().strip()
-                            if not content:
-                                print("内容仍然为空，可能加载失败")
-                else:
-                    print("没有更多内容可加载")
+    def _item_key(self, kind, item):
+        """返回条目在已抓取索引中的键和用于计算哈希的内容"""
+        if kind == "posts":
+            return item["post_id"], item["content"]["text"]
+        return item["url"], item.get("content") or None
+
+    def _known_item_check(self, kind):
+        """生成 stop_check：已获取的条目中出现已知且未变化的条目时返回True"""
+        def check(items):
+            return any(self.seen_index.is_unchanged(kind, *self._item_key(kind, item)) for item in items)
+        return check
+
+    def _take_until_known(self, kind, items):
+        """截取到第一个已知且未变化的条目之前"""
+        for i, item in enumerate(items):
+            if self.seen_index.is_unchanged(kind, *self._item_key(kind, item)):
+                return items[:i]
+        return items
+
+    def _merge_incremental(self, kind, collected, previous, refresh_known, limit, counter_fields):
+        """合并本次抓取的条目和上次结果
+
+        按新到旧的顺序处理，遇到已知且未变化的条目即停止；refresh_known 为真时，
+        已知条目只用本次数据刷新互动计数，其余内容沿用上次结果。
+        """
+        previous_by_key = {self._item_key(kind, item)[0]: item for item in previous}
+        merged = []
+        fresh = 0
+        for item in collected:
+            key, content = self._item_key(kind, item)
+            if self.seen_index.is_unchanged(kind, key, content):
+                if not refresh_known:
                     break
-                
-                # 等待新内容完全加载
-                time.sleep(3)
-            
-            # 返回前10条或所有可用的帖子
-            return post_elements[:target_count]
-        except Exception as e:
-            print(f"滚动加载时出错: {e}")
-            return page.query_selector_all("div[class*='post-content']")[:target_count]
+                known = previous_by_key.get(key)
+                if known is not None:
+                    for field in counter_fields:
+                        if field in item:
+                            known[field] = item[field]
+                    item = known
+            else:
+                fresh += 1
+            self.seen_index.mark(kind, key, content)
+            merged.append(item)
+        
+        # 上次结果可能包含崩溃前追加的重复记录，按键只保留一份
+        merged_keys = {self._item_key(kind, item)[0] for item in merged}
+        for item in previous:
+            key = self._item_key(kind, item)[0]
+            if key not in merged_keys:
+                merged_keys.add(key)
+                merged.append(item)
+        self.seen_index.save()
+        merged = merged[:limit]
+        print(f"增量爬取: 新增或变化 {fresh} 条，合并后共 {len(merged)} 条")
+        return merged
 
-    def process_single_post(self, page, post, post_index):
-        """处理单条帖子"""
-        try:
-            # 1. 获取帖子基本信息
-            post_id = post.get_attribute("data-post-id")
-            post_time = post.get_attribute("data-post-time")
-            
-            print(f"\n开始处理帖子 {post_id} (索引: {post_index})")
-            
-            # 2. 获取作者信息
-            author_element = post.query_selector("span.name-text.name-text_username")
-            author = author_element.inner_text() if author_element else "Unknown"
-            
-            avatar_element = post.query_selector("img.avatar-item-img")
-            avatar_url = avatar_element.get_attribute("src") if avatar_element else None
-            
-            print(f"作者: {author}")
-            
-            # 3. 获取帖子内容
-            content_element = post.query_selector("div.text-wrapper")
-            content = content_element.inner_text().strip() if content_element else ""
-            
-            # 获取图片
-            images = []
-            image_elements = post.query_selector_all("img.post-img")
-            for img in image_elements:
-                img_url = img.get_attribute("src")
-                if img_url:
-                    images.append(img_url)
-            
-            # 获取标签
-            tags = []
-            tag_elements = post.query_selector_all("a.real-link")
-            for tag in tag_elements:
-                tag_text = tag.inner_text().strip()
-                if tag_text.startswith("#"):
-                    tags.append(tag_text)
-            
-            print(f"内容长度: {len(content)} 字符")
-            print(f"图片数量: {len(images)}")
-            print(f"标签数量: {len(tags)}")
-            
-            # 4. 获取互动数据
-            views_element = post.query_selector("span.count")
-            views = views_element.inner_text() if views_element else "0"
-            
-            comments_element = post.query_selector("span.count[data-test='post-comment-icon']")
-            comments = comments_element.inner_text() if comments_element else "0"
-            
-            emojis = {}
-            emoji_elements = post.query_selector_all("div.emoji-list-item")
-            for emoji in emoji_elements:
-                emoji_type = emoji.get_attribute("class").split()[-1]
-                count = emoji.query_selector("span").inner_text()
-                emojis[emoji_type] = count
-            
-            print(f"浏览量: {views}")
-            print(f"评论数: {comments}")
-            print(f"表情数据: {emojis}")
-            
-            # 5. 处理Read all按钮
-            read_all_button = post.query_selector("span.read-all")
-            if read_all_button:
-                print("发现Read all按钮，点击展开完整内容...")
-                try:
-                    read_all_button.click()
-                    time.sleep(3)
-                    
-                    # 重新获取内容
-                    content_element = post.query_selector("div.text-wrapper")
-                    if content_element:
-                        new_content = content_element.inner_text().strip()
-                        print("Read all new_content{}",new_content)
-                        if new_content and len(new_content) != len(content):
-                            content = new_content
-                            print("成功获取完整内容")
-                except Exception as e:
-                    print(f"点击Read all按钮失败: {e}")
-            
-            # 6. 整理数据
-            post_data = {
-                "post_id": post_id,
-                "index": post_index,
-                "time": post_time,
-                "author": {
-                    "username": author,
-                    "avatar": avatar_url
-                },
-                "content": {
-                    "text": content,
-                    "images": images,
-                    "tags": tags
-                },
-                "interaction": {
-                    "views": views,
-                    "comments": comments,
-                    "emojis": emojis
-                },
-                "crawl_time": datetime.now().isoformat()
-            }
-            
-            # 7. 保存数据
-            self.save_data([post_data], "cmc_btc_analysis.json")
-            print(f"成功保存帖子 {post_id} 的数据")
-            
-            return post_data
-            
-        except Exception as e:
-            print(f"处理帖子时出错: {e}")
-            return None
+    def crawl_market_news(self, refresh_known=False, source=None):
+        """爬取市场新闻数据
 
-    def crawl_market_news(self):
-        """爬取市场新闻数据"""
+        增量模式下遇到已抓取且未变化的帖子即停止；refresh_known 为真时继续抓取到目标数量，
+        并只刷新已知帖子的互动数据。source 为数据源配置，默认爬取BTC话题。
+        """
         posts = []
         retry_count = 0
-        target_count = 20  # 目标获取的帖子数量
+        target_count = source["target_count"] if source else 20  # 目标获取的帖子数量
+        url = source["url"] if source else self.cmc_url
+        output = source["output"] if source else POSTS_FILE
+        
+        # 增量模式下先读取上次结果
+        previous_posts = self.load_data(output) if self.incremental else []
+        stop_check = self._known_item_check("posts") if self.incremental and not refresh_known else None
         
         while retry_count < self.max_retries:
             try:
-                with sync_playwright() as p:
-                    try:
-                        browser = p.chromium.launch(
-                            headless=False,
-                            args=['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
-                        )
-                    except Exception as e:
-                        print(f"启动Chromium失败，尝试使用Firefox: {e}")
-                        browser = p.firefox.launch(
-                            headless=False,
-                            args=['--disable-gpu']
-                        )
-                    
-                    context = browser.new_context(
-                        viewport={'width': 1920, 'height': 1080},
-                        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-                    )
+                with self.browser_pool.context() as context, JsonlWriter(os.path.join(self.data_path, output)) as writer:
                     page = context.new_page()
                     
                     try:
@@ -282,185 +184,92 @@ class FinancialDataCrawler:
                         # 设置页面超时
                         page.set_default_timeout(self.timeout)
                         
-                        # 访问页面
-                        page.goto(self.cmc_url, wait_until="domcontentloaded")
+                        # 访问页面，先开始跟踪信息流接口请求和响应
+                        self.waiter.watch_network(page, self.feed_api_patterns)
+                        harvester = FeedHarvester(page, self.feed_api_patterns, rate_limiter=self.rate_limiter) if self.harvest_mode == "feed" else None
+                        self._goto(page, url, wait_until="domcontentloaded")
                         
                         # 等待页面加载
                         self.wait_for_page_load(page)
                         
-                        # 获取初始帖子
-                        virtual_items = page.query_selector_all("div[data-test='virtual-item']")
-                        if not virtual_items:
-                            raise Exception("未找到任何帖子内容")
-                        
-                        print(f"初始加载了 {len(virtual_items)} 条帖子")
-                        
-                        # 处理已加载的帖子
-                        for i, virtual_item in enumerate(virtual_items, 1):
-                            # 获取帖子索引
-                            post_index = virtual_item.get_attribute("data-index")
-                            print(f"\n处理第 {i}/{len(virtual_items)} 条帖子 (索引: {post_index})")
+                        if harvester and harvester.has_feed():
+                            # 直接从信息流接口翻页获取，不再滚动DOM
+                            posts = harvester.collect_posts(target_count, stop_check)
+                            writer.extend(posts)
+                            print(f"从信息流接口获取了 {len(posts)} 条帖子 (翻页 {harvester.pages_fetched} 次)")
+                        else:
+                            if harvester:
+                                print("未捕获到信息流响应，回退到DOM提取")
                             
-                            # 获取帖子内容
-                            post = virtual_item.query_selector("div[class*='post-content']")
-                            if not post:
-                                print(f"未找到帖子内容，跳过")
-                                continue
-                                
-                            post_data = self.process_single_post(page, post, post_index)
-                            if post_data:
-                                posts.append(post_data)
+                            if not page.query_selector("div[data-test='virtual-item']"):
+                                raise Exception("未找到任何帖子内容")
                             
-                            # 每处理5条保存一次完整数据
-                            if i % 5 == 0:
-                                self.save_data(posts, "cmc_btc_analysis.json")
-                                print(f"已保存 {len(posts)} 条帖子的完整数据")
+                            # 按条目实际位置滚动虚拟列表，新挂载的条目整批提取
+                            list_harvester = VirtualListHarvester(page)
+                            posts = list_harvester.collect(target_count, stop_check, writer)
+                            print(f"从虚拟列表获取了 {len(posts)} 条帖子 (滚动 {list_harvester.stats['rounds']} 轮)")
                         
-                        # 如果已处理的帖子数量不足，继续滚动加载
-                        while len(posts) < target_count:
-                            print(f"\n当前已处理 {len(posts)} 条帖子，未达到目标数量 {target_count}，继续加载...")
-                            
-                            # 记录当前最后一个帖子的data-index
-                            last_virtual_item = virtual_items[-1]
-                            last_index = int(last_virtual_item.get_attribute("data-index"))
-                            print(f"当前最后一个帖子的索引: {last_index}")
-                            
-                            # 滚动到底部
-                            page.mouse.wheel(0, 500)
-                            time.sleep(5)  # 等待新内容加载
-                            
-                            # 获取新加载的帖子
-                            new_virtual_items = []
-                            for i in range(1, 4):  # 尝试获取最多4个新帖子
-                                next_index = last_index + i
-                                new_item = page.query_selector(f"div[data-test='virtual-item'][data-index='{next_index}']")
-                                if new_item:
-                                    new_virtual_items.append(new_item)
-                                else:
-                                    break
-
-                            # next_index = last_index + 1
-                            # new_item = page.query_selector(f"div[data-test='virtual-item'][data-index='{next_index}']")
-                            # if new_item:
-                            #     new_virtual_items.append(new_item)
-                            # if not new_virtual_items:
-                            #     print("没有更多内容可加载")
-                            #     break
-                            
-                            print(f"新加载了 {len(new_virtual_items)} 条帖子")
-                            
-                            # 处理新加载的帖子
-                            for virtual_item in new_virtual_items:
-                                # 获取帖子索引
-                                post_index = virtual_item.get_attribute("data-index")
-                                print(f"\n处理新加载的帖子 (索引: {post_index}, 当前总数: {len(posts) + 1})")
-                                
-                                # 获取帖子内容
-                                post = virtual_item.query_selector("div[class*='post-content']")
-                                if not post:
-                                    print(f"未找到帖子内容，跳过")
-                                    continue
-                                    
-                                post_data = self.process_single_post(page, post, post_index)
-                                if post_data:
-                                    posts.append(post_data)
-                                
-                                # 每处理5条保存一次完整数据
-                                if len(posts) % 5 == 0:
-                                    self.save_data(posts, "cmc_btc_analysis.json")
-                                    print(f"已保存 {len(posts)} 条帖子的完整数据")
-                                
-                                # 如果达到目标数量，退出循环
-                                if len(posts) >= target_count:
-                                    break
-                            
-                            # 更新帖子列表
-                            virtual_items.extend(new_virtual_items)
-                            
-                            # 如果已经获取到足够数量的帖子，退出循环
-                            if len(posts) >= target_count:
-                                break
+                        if self.incremental:
+                            posts = self._merge_incremental("posts", posts, previous_posts, refresh_known, target_count, ["interaction"])
                         
-                        # 最终保存完整数据
-                        self.save_data(posts, "cmc_btc_analysis.json")
-                        print(f"成功爬取 {len(posts)} 条BTC分析帖子")
+                        # 压缩：用最终结果原子替换追加日志
+                        writer.close()
+                        self.save_data(posts, output)
+                        print(f"成功爬取 {len(posts)} 条帖子: {url}")
                         break  # 成功获取数据，退出重试循环
                         
                     except Exception as e:
                         print(f"爬取过程出错: {e}")
                         retry_count += 1
                         if retry_count < self.max_retries:
-                            print(f"将在5秒后重试...")
-                            time.sleep(5)
-                    finally:
-                        context.close()
-                        browser.close()
+                            delay = self.rate_limiter.backoff_delay(retry_count)
+                            print(f"将在{delay:.1f}秒后重试...")
+                            time.sleep(delay)
             except Exception as e:
-                print(f"Playwright初始化失败: {e}")
+                print(f"获取浏览器失败: {e}")
                 retry_count += 1
                 if retry_count < self.max_retries:
-                    print(f"将在5秒后重试...")
-                    time.sleep(5)
+                    delay = self.rate_limiter.backoff_delay(retry_count)
+                    print(f"将在{delay:.1f}秒后重试...")
+                    time.sleep(delay)
         
         return posts
 
     def crawl_price_data(self):
-        """爬取价格数据"""
+        """获取价格数据：配置的币种加上帖子中出现的 $ 标签币种"""
+        symbols = list(self.price_symbols)
+        for symbol in PriceFeed.extract_symbols(self.load_data(MERGED_FILES["posts"]) or self.load_data(POSTS_FILE)):
+            if symbol not in symbols:
+                symbols.append(symbol)
+        
         try:
-            with sync_playwright() as p:
-                try:
-                    browser = p.chromium.launch(
-                        headless=False,
-                        args=['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
-                    )
-                except Exception as e:
-                    print(f"启动Chromium失败，尝试使用Firefox: {e}")
-                    browser = p.firefox.launch(
-                        headless=False,
-                        args=['--disable-gpu']
-                    )
-                
-                context = browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-                )
-                page = context.new_page()
-                
-                try:
-                    print("正在获取BTC价格数据...")
-                    page.goto("https://coinmarketcap.com/currencies/bitcoin/", wait_until='networkidle')
-                    page.wait_for_selector("[data-price-target='price']", timeout=30000)
-                    
-                    # 获取当前价格
-                    price_element = page.query_selector("[data-price-target='price']")
-                    current_price = price_element.inner_text() if price_element else "Unknown"
-                    
-                    # 获取24h变化
-                    change_element = page.query_selector("span[class*='change-percent']")
-                    price_change = change_element.inner_text() if change_element else "Unknown"
-                    
-                    price_data = {
-                        "current_price": current_price,
-                        "price_change_24h": price_change,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    
-                    self.save_data([price_data], "btc_price_data.json")
-                    print("价格数据爬取完成")
-                    
-                except Exception as e:
-                    print(f"价格数据爬取失败: {e}")
-                finally:
-                    context.close()
-                    browser.close()
+            print(f"正在获取 {len(symbols)} 个币种的价格数据...")
+            prices = self.price_feed.fetch_prices(symbols)
         except Exception as e:
-            print(f"Playwright初始化失败: {e}")
+            print(f"价格数据获取失败: {e}")
+            return {}
+        
+        self.save_data(list(prices.values()), "price_data.json")
+        self.price_history.append_prices(prices)
+        btc = prices.get("BTC")
+        if btc:
+            # 保持原有BTC价格文件的字段，数值改为浮点数
+            self.save_data([{
+                "current_price": btc["price"],
+                "price_change_24h": btc["change_24h"],
+                "timestamp": btc["timestamp"]
+            }], "btc_price_data.json")
+        print(f"价格数据获取完成，共 {len(prices)} 个币种")
+        return prices
 
     def save_data(self, data, filename):
         """保存数据到文件"""
         filepath = os.path.join(self.data_path, filename)
         if isinstance(data, pd.DataFrame):
             data.to_csv(filepath, index=False, encoding='utf-8')
+        elif isinstance(data, list) and filename.endswith('.jsonl'):
+            # 原子重写JSONL文件
+            write_jsonl(filepath, data)
         elif isinstance(data, list):
             # 确保目录存在
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
@@ -470,139 +279,234 @@ class FinancialDataCrawler:
         else:
             raise ValueError(f"Unsupported data type: {type(data)}")
 
-    def crawl_technical_indicators(self):
-        """爬取技术指标数据"""
-        # 这里可以添加从TradingView或其他来源爬取技术指标的逻辑
-        pass
+    def load_data(self, filename):
+        """读取之前保存的列表数据，文件不存在或损坏时返回空列表"""
+        filepath = os.path.join(self.data_path, filename)
+        if filename.endswith('.jsonl'):
+            if os.path.exists(filepath):
+                return list(iter_jsonl(filepath))
+            # 兼容旧版本保存的JSON数组文件
+            filename = filename[:-1]
+            filepath = filepath[:-1]
+        if not os.path.exists(filepath):
+            return []
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"读取 {filename} 失败: {e}")
+            return []
 
-    def process_single_article(self, page, article):
-        """处理单篇文章"""
+    def crawl_technical_indicators(self):
+        """基于本地价格历史计算技术指标（RSI、MACD、布林带、ATR、均线、支撑/阻力）"""
         try:
-            # 1. 获取文章基本信息
-            title_element = article.query_selector("span[data-test='article-title']")
-            title = title_element.inner_text().strip() if title_element else ""
-            
-            author_element = article.query_selector("span.author-name")
-            author = author_element.inner_text().strip() if author_element else ""
+            snapshots = self.indicator_engine.update_all()
+        except Exception as e:
+            print(f"技术指标计算失败: {e}")
+            return {}
+        self.save_data(list(snapshots.values()), "technical_indicators.json")
+        print(f"技术指标计算完成，共 {len(snapshots)} 个币种")
+        return snapshots
+
+    def _extract_article_summary(self, article):
+        """从文章列表项中提取基本信息和链接"""
+        title_element = article.query_selector("span[data-test='article-title']")
+        title = title_element.inner_text().strip() if title_element else ""
+        
+        author_element = article.query_selector("span.author-name")
+        author = author_element.inner_text().strip() if author_element else ""
+        
+        date_element = article.query_selector("span.article-date")
+        date = date_element.inner_text().strip() if date_element else ""
+        
+        article_link = article.query_selector("a[target='_blank']")
+        if not article_link:
+            print("未找到文章链接")
+            return None
             
-            date_element = article.query_selector("span.article-date")
-            date = date_element.inner_text().strip() if date_element else ""
+        article_url = article_link.get_attribute("href")
+        if not article_url:
+            print("未找到文章URL")
+            return None
+        
+        return {
+            "title": title,
+            "author": author,
+            "date": date,
+            "url": article_url
+        }
+
+    def _extract_article_detail(self, detail_page, summary):
+        """从已打开的文章详情页中提取内容"""
+        try:
+            detail_page.wait_for_selector("article div.base-text", timeout=10000)
+        except PlaywrightTimeoutError:
+            print("等待文章正文超时，但将继续尝试获取内容...")
+        
+        if self.extraction_mode == "batch":
+            article_data = extract_article(detail_page, summary)
+            if not article_data:
+                print("未找到文章内容")
+            return article_data
+        
+        article_element = detail_page.query_selector("article")
+        if not article_element:
+            print("未找到文章内容")
+            return None
+        
+        # 获取文章标题
+        detail_title = article_element.query_selector("h1")
+        if detail_title:
+            detail_title = detail_title.inner_text().strip()
+        
+        # 获取文章内容
+        content_elements = article_element.query_selector_all("div.base-text")
+        if not content_elements:
+            print("未找到文章内容")
+            return None
+        
+        # 合并所有base-text的内容
+        content_parts = []
+        for content_element in content_elements:
+            text = content_element.inner_text().strip()
+            if text:
+                content_parts.append(text)
+        
+        content = "\n\n".join(content_parts)
+        
+        # 获取文章图片
+        images = []
+        image_elements = article_element.query_selector_all("img")
+        for img in image_elements:
+            img_url = img.get_attribute("src")
+            if img_url:
+                images.append(img_url)
+        
+        # 获取文章标签
+        tags = []
+        tag_elements = article_element.query_selector_all("a.article-tag")
+        for tag in tag_elements:
+            tag_text = tag.inner_text().strip()
+            if tag_text:
+                tags.append(tag_text)
+        
+        # 获取文章统计信息
+        views_element = article_element.query_selector("span.article-views")
+        views = views_element.inner_text().strip() if views_element else "0"
+        
+        comments_element = article_element.query_selector("span.article-comments")
+        comments = comments_element.inner_text().strip() if comments_element else "0"
+        
+        # 整理数据
+        return {
+            "title": detail_title or summary["title"],  # 优先使用详情页的标题
+            "author": summary["author"],
+            "date": summary["date"],
+            "content": content,
+            "images": images,
+            "tags": tags,
+            "views": views,
+            "comments": comments,
+            "url": summary["url"],
+            "crawl_time": datetime.now().isoformat()
+        }
+
+    def _goto(self, page, url, **kwargs):
+        """限速的页面导航：超时或 429/5xx 时在同一页面上退避重试，不重建浏览器"""
+        response = self.rate_limiter.call(url, lambda: page.goto(url, **kwargs))
+        if response is not None and response.status >= 400:
+            raise Exception(f"页面请求失败: {response.status} {url}")
+        return response
+
+    def _fetch_article_http(self, summary):
+        """通过HTTP获取文章详情，失败或正文不在HTML中时返回 None"""
+        try:
+            return self.http_fetcher.fetch(summary)
+        except Exception as e:
+            print(f"HTTP获取文章失败 {summary['url']}: {e}")
+            return None
+
+    def fetch_article_details(self, context, summaries, concurrency=None, on_result=None):
+        """在同一上下文中并发打开多个文章标签页获取详情
+
+        开启 article_http_first 时先通过HTTP获取，只有正文不在初始HTML中的文章才打开标签页，
+        每篇文章的 fetch_path 字段记录实际使用的方式（http / browser）。
+        最多同时保持 concurrency 个标签页在加载，结果按 summaries 的原始顺序返回，
+        获取失败的位置为 None。每成功获取一篇调用一次 on_result(文章)。
+        """
+        concurrency = max(1, concurrency or self.article_concurrency)
+        results = [None] * len(summaries)
+        
+        # 先并发尝试HTTP请求，大部分文章正文由服务端渲染，一次请求即可获取
+        if self.article_http_first and summaries:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                http_results = list(executor.map(self._fetch_article_http, summaries))
+            for index, article_data in enumerate(http_results):
+                if article_data:
+                    results[index] = article_data
+                    self.article_fetch_stats["http"] += 1
+                    if on_result:
+                        on_result(article_data)
+            print(f"HTTP获取了 {sum(1 for item in http_results if item)}/{len(summaries)} 篇文章")
+        
+        # 其余文章回退到浏览器标签页
+        pending = deque((index, summary) for index, summary in enumerate(summaries) if results[index] is None)
+        in_flight = deque()
+        
+        while pending or in_flight:
+            # 补满并发窗口：先发起导航，不等待页面加载完成
+            while pending and len(in_flight) < concurrency:
+                index, summary = pending.popleft()
+                detail_page = context.new_page()
+                try:
+                    self._goto(detail_page, summary["url"], wait_until="commit")
+                    in_flight.append((index, summary, detail_page))
+                except Exception as e:
+                    print(f"打开文章失败 {summary['url']}: {e}")
+                    detail_page.close()
             
-            # 2. 获取文章链接
-            article_link = article.query_selector("a[target='_blank']")
-            if not article_link:
-                print("未找到文章链接")
-                return None
-                
-            article_url = article_link.get_attribute("href")
-            if not article_url:
-                print("未找到文章URL")
-                return None
+            if not in_flight:
+                continue
             
-            # 3. 在新页面中获取文章内容
-            new_page = page.context.new_page()
+            # 按发起顺序处理最早的标签页，其余标签页在后台继续加载
+            index, summary, detail_page = in_flight.popleft()
+            print(f"\n处理第 {index + 1}/{len(summaries)} 篇文章")
             try:
-                new_page.goto(article_url, wait_until="domcontentloaded")
-                time.sleep(5)  # 等待页面加载
-                
-                # 导出页面内容到文件
-                new_page.wait_for_selector("article", timeout=10000)
-                article_element = new_page.query_selector("article")
-                
-                if not article_element:
-                    print("未找到文章内容")
-                    return None
-                
-                # 获取文章标题
-                detail_title = article_element.query_selector("h1")
-                if detail_title:
-                    detail_title = detail_title.inner_text().strip()
-                
-                # 获取文章内容
-                content_elements = article_element.query_selector_all("div.base-text")
-                if not content_elements:
-                    print("未找到文章内容")
-                    return None
-                
-                # 合并所有base-text的内容
-                content_parts = []
-                for content_element in content_elements:
-                    text = content_element.inner_text().strip()
-                    if text:
-                        content_parts.append(text)
-                
-                content = "\n\n".join(content_parts)
-                
-                # 获取文章图片
-                images = []
-                image_elements = article_element.query_selector_all("img")
-                for img in image_elements:
-                    img_url = img.get_attribute("src")
-                    if img_url:
-                        images.append(img_url)
-                
-                # 获取文章标签
-                tags = []
-                tag_elements = article_element.query_selector_all("a.article-tag")
-                for tag in tag_elements:
-                    tag_text = tag.inner_text().strip()
-                    if tag_text:
-                        tags.append(tag_text)
-                
-                # 获取文章统计信息
-                views_element = article_element.query_selector("span.article-views")
-                views = views_element.inner_text().strip() if views_element else "0"
-                
-                comments_element = article_element.query_selector("span.article-comments")
-                comments = comments_element.inner_text().strip() if comments_element else "0"
-                
-                # 整理数据
-                article_data = {
-                    "title": detail_title or title,  # 优先使用详情页的标题
-                    "author": author,
-                    "date": date,
-                    "content": content,
-                    "images": images,
-                    "tags": tags,
-                    "views": views,
-                    "comments": comments,
-                    "url": article_url,
-                    "crawl_time": datetime.now().isoformat()
-                }
-                
-                return article_data
-                
+                detail_page.wait_for_load_state("domcontentloaded")
+                results[index] = self._extract_article_detail(detail_page, summary)
+                if results[index]:
+                    results[index]["fetch_path"] = "browser"
+                    self.article_fetch_stats["browser"] += 1
+                    if on_result:
+                        on_result(results[index])
+            except Exception as e:
+                print(f"处理文章时出错: {e}")
             finally:
-                new_page.close()
-        except Exception as e:
-            print(f"处理文章时出错: {e}")
-            return None
+                detail_page.close()
+        
+        return results
+
+    def crawl_articles(self, refresh_known=False, source=None):
+        """爬取文章列表
 
-    def crawl_articles(self):
-        """爬取文章列表"""
+        增量模式下遇到已抓取的文章即停止；refresh_known 为真时已知文章不再打开详情页，
+        只用列表数据刷新浏览和评论数。source 为数据源配置，默认爬取社区文章列表。
+        """
         articles = []
         retry_count = 0
-        target_count = 20  # 目标获取的文章数量
+        target_count = source["target_count"] if source else 20  # 目标获取的文章数量
+        url = source["url"] if source else self.articles_url
+        output = source["output"] if source else ARTICLES_FILE
+        
+        # 增量模式下先读取上次结果
+        previous_articles = self.load_data(output) if self.incremental else []
+        previous_urls = {item["url"] for item in previous_articles}
+        stop_check = self._known_item_check("articles") if self.incremental and not refresh_known else None
         
         while retry_count < self.max_retries:
             try:
-                with sync_playwright() as p:
-                    try:
-                        browser = p.chromium.launch(
-                            headless=False,
-                            args=['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
-                        )
-                    except Exception as e:
-                        print(f"启动Chromium失败，尝试使用Firefox: {e}")
-                        browser = p.firefox.launch(
-                            headless=False,
-                            args=['--disable-gpu']
-                        )
-                    
-                    context = browser.new_context(
-                        viewport={'width': 1920, 'height': 1080},
-                        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-                    )
+                with self.browser_pool.context() as context, JsonlWriter(os.path.join(self.data_path, output)) as writer:
                     page = context.new_page()
                     
                     try:
@@ -611,60 +515,214 @@ class FinancialDataCrawler:
                         # 设置页面超时
                         page.set_default_timeout(self.timeout)
                         
-                        # 访问页面
-                        page.goto(self.articles_url, wait_until="domcontentloaded")
+                        # 访问页面，先开始监听信息流接口响应
+                        harvester = FeedHarvester(page, self.feed_api_patterns, rate_limiter=self.rate_limiter) if self.harvest_mode == "feed" else None
+                        self._goto(page, url, wait_until="domcontentloaded")
                         
                         # 等待页面加载
                         page.wait_for_load_state("networkidle", timeout=self.timeout)
-                        time.sleep(5)  # 等待动态内容加载
-                        
-                        # 获取文章列表
-                        article_elements = page.query_selector_all("div[data-test='article-item']")
-                        if not article_elements:
-                            raise Exception("未找到任何文章内容")
-                        
-                        print(f"初始加载了 {len(article_elements)} 篇文章")
+                        self.waiter.wait_for_count_increase(page, "div[data-test='article-item']", 0)
                         
-                        # 处理文章
-                        for i, article in enumerate(article_elements, 1):
-                            print(f"\n处理第 {i}/{len(article_elements)} 篇文章")
+                        if harvester and harvester.has_feed():
+                            summaries = harvester.collect_articles(target_count, stop_check)
+                            print(f"从信息流接口获取了 {len(summaries)} 篇文章")
+                        else:
+                            if harvester:
+                                print("未捕获到信息流响应，回退到DOM提取")
                             
-                            article_data = self.process_single_article(page, article)
-                            if article_data:
-                                articles.append(article_data)
+                            # 获取文章列表
+                            article_elements = page.query_selector_all("div[data-test='article-item']")
+                            if not article_elements:
+                                raise Exception("未找到任何文章内容")
                             
-                            # 每处理5条保存一次完整数据
-                            if i % 5 == 0:
-                                self.save_data(articles, "cmc_articles.json")
-                                print(f"已保存 {len(articles)} 篇文章的完整数据")
+                            print(f"初始加载了 {len(article_elements)} 篇文章")
                             
-                            # 如果达到目标数量，退出循环
-                            if len(articles) >= target_count:
-                                break
+                            # 先收集列表页上的文章链接
+                            summaries = []
+                            for article in article_elements:
+                                summary = self._extract_article_summary(article)
+                                if summary:
+                                    summaries.append(summary)
+                                if len(summaries) >= target_count:
+                                    break
+                        
+                        if self.incremental and not refresh_known:
+                            summaries = self._take_until_known("articles", summaries)
+                        
+                        # 并发获取文章详情，接口数据中已包含正文的文章和已抓取过的文章无需再打开详情页；
+                        # refresh_known 时列表项上没有阅读数/评论数，已抓取过的文章也要重新打开详情页刷新计数
+                        def needs_detail(item):
+                            if item.get("content"):
+                                return False
+                            return not (self.incremental and not refresh_known and item["url"] in previous_urls
+                                        and self.seen_index.is_unchanged("articles", item["url"]))
+                        
+                        writer.extend(item for item in summaries if item.get("content"))
+                        pending = [item for item in summaries if needs_detail(item)]
+                        pending_ids = {id(item) for item in pending}
+                        details = iter(self.fetch_article_details(context, pending, on_result=writer.append))
+                        results = [next(details) if id(item) in pending_ids else item for item in summaries]
+                        articles = [item for item in results if item]
+                        
+                        if self.incremental:
+                            articles = self._merge_incremental("articles", articles, previous_articles, refresh_known, target_count, ["views", "comments"])
                         
-                        # 最终保存完整数据
-                        self.save_data(articles, "cmc_articles.json")
-                        print(f"成功爬取 {len(articles)} 篇文章")
+                        # 压缩：用最终结果原子替换追加日志
+                        writer.close()
+                        self.save_data(articles, output)
+                        print(f"成功爬取 {len(articles)} 篇文章: {url}")
                         break  # 成功获取数据，退出重试循环
                         
                     except Exception as e:
                         print(f"爬取过程出错: {e}")
                         retry_count += 1
                         if retry_count < self.max_retries:
-                            print(f"将在5秒后重试...")
-                            time.sleep(5)
-                    finally:
-                        context.close()
-                        browser.close()
+                            delay = self.rate_limiter.backoff_delay(retry_count)
+                            print(f"将在{delay:.1f}秒后重试...")
+                            time.sleep(delay)
             except Exception as e:
-                print(f"Playwright初始化失败: {e}")
+                print(f"获取浏览器失败: {e}")
                 retry_count += 1
                 if retry_count < self.max_retries:
-                    print(f"将在5秒后重试...")
-                    time.sleep(5)
+                    delay = self.rate_limiter.backoff_delay(retry_count)
+                    print(f"将在{delay:.1f}秒后重试...")
+                    time.sleep(delay)
         
         return articles
 
+    def crawl_source(self, source, refresh_known=False):
+        """爬取单个数据源，使用该数据源自己的已抓取索引"""
+        self.seen_index = SeenIndex(self.data_path, source["seen_index"])
+        if source["type"] == "posts":
+            return self.crawl_market_news(refresh_known, source)
+        return self.crawl_articles(refresh_known, source)
+
+    def crawl_sources(self, sources=None, workers=None, refresh_known=False):
+        """用常驻的浏览器工作进程池并行爬取所有数据源，完成后合并各数据源的结果
+
+        每个工作进程持有自己的浏览器池，依次处理分配给它的数据源；工作进程和浏览器
+        在多次爬取之间复用。返回每个数据源的条数、耗时和浏览器统计，以及每个工作进程的浏览器启动次数。
+        """
+        sources = sources if sources is not None else load_sources()
+        workers = workers or int(os.getenv('CRAWL_WORKERS', '3'))
+        print(f"并行爬取 {len(sources)} 个数据源 (工作进程 {min(workers, len(sources))} 个)")
+        
+        results = {}
+        executor = _get_source_pool(workers)
+        futures = {executor.submit(_crawl_source_worker, source, refresh_known): source for source in sources}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                results[source["name"]] = future.result()
+            except BrokenProcessPool as e:
+                # 工作进程异常退出后进程池不可再用，下次爬取时重建
+                print(f"数据源 {source['name']} 爬取失败，工作进程已退出: {e}")
+                results[source["name"]] = {"count": 0, "error": str(e)}
+                shutdown_source_pool()
+            except Exception as e:
+                print(f"数据源 {source['name']} 爬取失败: {e}")
+                results[source["name"]] = {"count": 0, "error": str(e)}
+        
+        results["workers"] = {
+            stats["worker"]: stats["browser"]["launches"]
+            for stats in results.values() if "worker" in stats
+        }
+        merged = self.merge_sources(sources)
+        if self.cache_images:
+            results["image_cache"] = self.cache_media(merged)
+        return results
+
+    def merge_sources(self, sources):
+        """把各数据源的输出按类型合并，按键去重并标注来源，返回 {类型: 合并结果}"""
+        results = {}
+        for kind, merged_file in MERGED_FILES.items():
+            kind_sources = [source for source in sources if source["type"] == kind]
+            if not kind_sources:
+                continue
+            merged = []
+            seen_keys = set()
+            for source in kind_sources:
+                for item in self.load_data(source["output"]):
+                    key = self._item_key(kind, item)[0]
+                    if key in seen_keys:
+                        continue
+                    seen_keys.add(key)
+                    merged.append(dict(item, source=source["name"]))
+            self.save_data(merged, merged_file)
+            results[kind] = merged
+            print(f"合并{kind}: {len(merged)} 条 -> {merged_file}")
+        return results
+
+    def cache_media(self, merged):
+        """把合并结果中的帖子和文章图片写入共享的图片缓存"""
+        urls = []
+        for item in merged.get("posts", []):
+            urls.extend((item.get("content") or {}).get("images") or [])
+        for item in merged.get("articles", []):
+            urls.extend(item.get("images") or [])
+        image_cache = ImageCache.get_instance()
+        count = image_cache.prefetch(url for url in urls if url and url.startswith("http"))
+        print(f"缓存图片: {count}/{len(set(urls))} 张")
+        return image_cache.get_stats()
+
+
+_worker_crawler = None
+_source_pool = None
+_source_pool_workers = 0
+_source_pool_lock = threading.Lock()
+
+
+def _get_source_pool(workers):
+    """返回常驻的数据源工作进程池，工作进程数变化时重建；进程退出时关闭"""
+    global _source_pool, _source_pool_workers
+    with _source_pool_lock:
+        if _source_pool is not None and _source_pool_workers != workers:
+            _source_pool.shutdown(wait=True)
+            _source_pool = None
+        if _source_pool is None:
+            # spawn 启动的子进程不会继承父进程中的Playwright/线程状态
+            _source_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                               initializer=_init_crawl_worker, initargs=(workers,))
+            _source_pool_workers = workers
+        return _source_pool
+
+
+def shutdown_source_pool():
+    """关闭数据源工作进程池，工作进程退出时关闭各自的浏览器"""
+    global _source_pool
+    with _source_pool_lock:
+        if _source_pool is not None:
+            _source_pool.shutdown(wait=True)
+            _source_pool = None
+
+
+atexit.register(shutdown_source_pool)
+
+
+def _init_crawl_worker(workers=1):
+    """工作进程初始化：创建进程内的爬虫，并在进程退出时关闭浏览器"""
+    global _worker_crawler
+    # 各工作进程平分同一域名的请求速率
+    HostRateLimiter.get_instance().scale(1 / workers)
+    _worker_crawler = FinancialDataCrawler()
+    # 进程池的工作进程退出时不执行atexit，用multiprocessing的Finalize关闭浏览器
+    Finalize(_worker_crawler, _worker_crawler.browser_pool.close, exitpriority=10)
+
+
+def _crawl_source_worker(source, refresh_known):
+    started = time.monotonic()
+    records = _worker_crawler.crawl_source(source, refresh_known)
+    return {
+        "count": len(records),
+        "seconds": round(time.monotonic() - started, 2),
+        "worker": os.getpid(),
+        "browser": _worker_crawler.browser_pool.get_stats(),
+        "blocked": _worker_crawler.browser_pool.take_block_stats(),
+        "article_fetch": dict(_worker_crawler.article_fetch_stats),
+        "rate_limit": _worker_crawler.rate_limiter.get_stats(),
+    }
+
+
 if __name__ == "__main__":
     # 设置控制台输出编码
     if sys.platform == 'win32':
@@ -673,6 +731,8 @@ if __name__ == "__main__":
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
     
     crawler = FinancialDataCrawler()
-    crawler.crawl_market_news()
-    crawler.crawl_articles()  # 添加文章爬取
-    # crawler.crawl_price_data() 
\ No newline at end of file
+    source_stats = crawler.crawl_sources()
+    crawler.crawl_price_data()
+    crawler.crawl_technical_indicators()
+    for name, stats in source_stats.items():
+        print(f"数据源 {name}: {stats}")
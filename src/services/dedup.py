@@ -0,0 +1,128 @@
+import re
+import hashlib
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger("dedup")
+
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_BASE = 1000003
+URL_PATTERN = re.compile(r"https?://\S+")
+NON_WORD_PATTERN = re.compile(r"[^\w$]+")
+
+
+def item_text(item):
+    """取帖子的 content.text 或文章的 content 作为去重文本"""
+    content = item.get("content", "")
+    if isinstance(content, dict):
+        content = content.get("text", "")
+    return content or item.get("title", "")
+
+
+def normalize_text(text):
+    """小写、去掉链接和标点、合并空白，使轻微改动后的转发得到相同文本"""
+    text = URL_PATTERN.sub(" ", text.lower())
+    return NON_WORD_PATTERN.sub(" ", text).strip()
+
+
+class Deduplicator:
+    """精确哈希 + MinHash/LSH 的近似重复聚类
+
+    先按规范化文本的哈希合并完全相同的条目，再对剩余条目计算字符 shingle 的
+    MinHash 签名，用分段 LSH 找出候选对，签名相似度不低于 threshold 的归为一簇。
+    每簇保留文本最长的一条，并附加 duplicate_count（簇内条目总数）。
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # multiply-shift 哈希族：64位乘法自然溢出后取高32位，避免逐元素取模
+        self._a = (rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1))[:, None]
+        self._b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)[:, None]
+        self._powers = np.array(
+            [pow(SHINGLE_BASE, self.shingle_size - 1 - i, MERSENNE_PRIME) for i in range(self.shingle_size)],
+            dtype=np.uint64
+        )
+        self.stats = {}
+
+    def _shingles(self, text):
+        """字符 k-gram 的多项式哈希（向量化计算）"""
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        if len(codes) < self.shingle_size:
+            codes = np.pad(codes, (0, self.shingle_size - len(codes)))
+        windows = sliding_window_view(codes, self.shingle_size)
+        return (windows * self._powers).sum(axis=1) % MERSENNE_PRIME
+
+    def signature(self, text):
+        hashes = (self._a * self._shingles(text)[None, :] + self._b) >> np.uint64(32)
+        return hashes.min(axis=1)
+
+    def run(self, items):
+        """返回去重后的条目列表，保持各簇首次出现的顺序"""
+        texts = [normalize_text(item_text(item)) for item in items]
+
+        # 1. 完全相同的文本
+        exact = {}
+        parent = list(range(len(items)))
+        for index, text in enumerate(texts):
+            if not text:
+                continue
+            digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+            parent[index] = exact.setdefault(digest, index)
+        uniques = [index for index in range(len(items)) if parent[index] == index]
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        # 2. MinHash + LSH 近似重复：同一分段哈希桶中的条目为候选，批量比较签名
+        signatures = np.zeros((len(items), self.num_perm), dtype=np.uint64)
+        buckets = [{} for _ in range(self.bands)]
+        near_merges = 0
+        for index in uniques:
+            if not texts[index]:
+                continue
+            signature = self.signature(texts[index])
+            signatures[index] = signature
+            candidates = set()
+            for band, bucket in enumerate(buckets):
+                members = bucket.setdefault(signature[band * self.rows:(band + 1) * self.rows].tobytes(), [])
+                candidates.update(members)
+                members.append(index)
+            if not candidates:
+                continue
+            candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarity = (signatures[candidates] == signature).mean(axis=1)
+            for other in candidates[similarity >= self.threshold]:
+                root, other_root = find(index), find(int(other))
+                if root != other_root:
+                    parent[max(root, other_root)] = min(root, other_root)
+                    near_merges += 1
+
+        # 3. 每簇保留文本最长的一条
+        clusters = {}
+        for index in range(len(items)):
+            clusters.setdefault(find(index), []).append(index)
+        results = []
+        for members in clusters.values():
+            representative = max(members, key=lambda index: (len(texts[index]), -index))
+            results.append((members[0], dict(items[representative], duplicate_count=len(members))))
+        results.sort(key=lambda pair: pair[0])
+
+        self.stats = {
+            "input": len(items),
+            "exact_duplicates": len(items) - len(uniques),
+            "near_duplicates": near_merges,
+            "output": len(results),
+        }
+        logger.info("去重: %s", self.stats)
+        return [item for _, item in results]
@@ -0,0 +1,118 @@
+# 单次 page.evaluate 完成的DOM批量提取：整批帖子或整篇文章的字段在浏览器内一次取完，
+# 避免逐字段 query_selector / inner_text 的IPC往返，返回结构与逐元素提取一致
+from datetime import datetime
+
+# 展开 Read all 后再提取；展开是异步渲染，在页面内轮询文本长度直到稳定
+POSTS_SCRIPT = """
+async (items, opts) => {
+    const afterIndex = opts.afterIndex;
+    const selected = items.filter(item => {
+        const index = Number(item.getAttribute('data-index'));
+        return afterIndex === null || index > afterIndex;
+    });
+
+    const textOf = el => el ? el.innerText : null;
+    const textLength = () => selected.reduce((sum, item) => {
+        const wrapper = item.querySelector('div.text-wrapper');
+        return sum + (wrapper ? wrapper.innerText.length : 0);
+    }, 0);
+
+    const buttons = selected.map(item => item.querySelector('span.read-all')).filter(Boolean);
+    if (buttons.length && opts.expandTimeout > 0) {
+        buttons.forEach(button => { try { button.click(); } catch (e) {} });
+        const deadline = Date.now() + opts.expandTimeout;
+        let last = -1;
+        let stableSince = Date.now();
+        while (Date.now() < deadline) {
+            await new Promise(resolve => setTimeout(resolve, 100));
+            const length = textLength();
+            if (length !== last) {
+                last = length;
+                stableSince = Date.now();
+            } else if (Date.now() - stableSince >= 300) {
+                break;
+            }
+        }
+    }
+
+    return selected.map(item => {
+        const post = item.querySelector("div[class*='post-content']");
+        if (!post) return null;
+
+        const author = post.querySelector('span.name-text.name-text_username');
+        const avatar = post.querySelector('img.avatar-item-img');
+        const content = post.querySelector('div.text-wrapper');
+        const views = post.querySelector('span.count');
+        const comments = post.querySelector("span.count[data-test='post-comment-icon']");
+
+        const emojis = {};
+        post.querySelectorAll('div.emoji-list-item').forEach(emoji => {
+            const classes = (emoji.getAttribute('class') || '').split(/\\s+/).filter(Boolean);
+            const count = emoji.querySelector('span');
+            if (classes.length) emojis[classes[classes.length - 1]] = textOf(count);
+        });
+
+        return {
+            post_id: post.getAttribute('data-post-id'),
+            index: item.getAttribute('data-index'),
+            time: post.getAttribute('data-post-time'),
+            author: {
+                username: author ? author.innerText : 'Unknown',
+                avatar: avatar ? avatar.getAttribute('src') : null
+            },
+            content: {
+                text: content ? content.innerText.trim() : '',
+                images: Array.from(post.querySelectorAll('img.post-img'))
+                    .map(img => img.getAttribute('src')).filter(Boolean),
+                tags: Array.from(post.querySelectorAll('a.real-link'))
+                    .map(tag => tag.innerText.trim()).filter(tag => tag.startsWith('#'))
+            },
+            interaction: {
+                views: views ? views.innerText : '0',
+                comments: comments ? comments.innerText : '0',
+                emojis: emojis
+            }
+        };
+    }).filter(Boolean);
+}
+"""
+
+ARTICLE_SCRIPT = """
+() => {
+    const article = document.querySelector('article');
+    if (!article) return null;
+    const title = article.querySelector('h1');
+    const views = article.querySelector('span.article-views');
+    const comments = article.querySelector('span.article-comments');
+    return {
+        title: title ? title.innerText.trim() : '',
+        content_parts: Array.from(article.querySelectorAll('div.base-text'))
+            .map(el => el.innerText.trim()).filter(Boolean),
+        images: Array.from(article.querySelectorAll('img'))
+            .map(img => img.getAttribute('src')).filter(Boolean),
+        tags: Array.from(article.querySelectorAll('a.article-tag'))
+            .map(tag => tag.innerText.trim()).filter(Boolean),
+        views: views ? views.innerText.trim() : '0',
+        comments: comments ? comments.innerText.trim() : '0'
+    };
+}
+"""
+
+
+def extract_article(page, summary):
+    """一次性提取文章详情页内容，未找到正文时返回 None"""
+    detail = page.evaluate(ARTICLE_SCRIPT)
+    if not detail or not detail["content_parts"]:
+        return None
+    return {
+        "title": detail["title"] or summary["title"],  # 优先使用详情页的标题
+        "author": summary["author"],
+        "date": summary["date"],
+        "content": "\n\n".join(detail["content_parts"]),
+        "images": detail["images"],
+        "tags": detail["tags"],
+        "views": detail["views"],
+        "comments": detail["comments"],
+        "url": summary["url"],
+        "crawl_time": datetime.now().isoformat()
+    }
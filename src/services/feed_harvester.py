@@ -0,0 +1,305 @@
+import json
+import logging
+from datetime import datetime
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+logger = logging.getLogger("feed-harvester")
+
+# 信息流接口中常见的字段名，不同接口版本命名不一致，按顺序取第一个存在的
+POST_ID_KEYS = ("gravityId", "postId", "id")
+POST_TEXT_KEYS = ("textContent", "content", "text")
+POST_TIME_KEYS = ("postTime", "createTime", "createdTime", "publishTime")
+VIEW_KEYS = ("impressionCount", "viewCount", "views")
+COMMENT_KEYS = ("commentCount", "comments")
+ARTICLE_TITLE_KEYS = ("title", "articleTitle")
+ARTICLE_URL_KEYS = ("articleUrl", "url", "link", "shareUrl")
+CURSOR_KEYS = ("lastScore", "nextCursor", "cursor", "lastId")
+PAGE_KEYS = ("page", "pageNo", "pageIndex")
+
+
+def _first(data, keys, default=None):
+    for key in keys:
+        if isinstance(data, dict) and data.get(key) not in (None, ""):
+            return data[key]
+    return default
+
+
+def _find_list(payload, predicate):
+    """在JSON中查找第一个所有元素都满足 predicate 的非空字典列表"""
+    if isinstance(payload, list):
+        if payload and all(isinstance(item, dict) for item in payload) and predicate(payload[0]):
+            return payload
+        for item in payload:
+            found = _find_list(item, predicate)
+            if found:
+                return found
+    elif isinstance(payload, dict):
+        for value in payload.values():
+            found = _find_list(value, predicate)
+            if found:
+                return found
+    return None
+
+
+def _find_key(payload, keys):
+    """在JSON中递归查找第一个出现的字段值"""
+    if isinstance(payload, dict):
+        value = _first(payload, keys)
+        if value is not None:
+            return value
+        for child in payload.values():
+            value = _find_key(child, keys)
+            if value is not None:
+                return value
+    return None
+
+
+def _is_post(item):
+    return _first(item, POST_ID_KEYS) is not None and _first(item, POST_TEXT_KEYS) is not None
+
+
+def _is_article(item):
+    if _first(item, ARTICLE_TITLE_KEYS) is None:
+        return False
+    return _first(item, ARTICLE_URL_KEYS) is not None or (item.get("id") is not None and not _is_post(item))
+
+
+def _image_urls(images):
+    urls = []
+    for image in images or []:
+        url = image.get("url") if isinstance(image, dict) else image
+        if url:
+            urls.append(url)
+    return urls
+
+
+COUNT_SUFFIXES = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+
+def parse_count(value):
+    """把接口或页面上的计数转换为整数，支持 "1,234"、"1.2K"、"3M" 这样的写法"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value or "").strip().replace(",", "").upper()
+    multiplier = COUNT_SUFFIXES.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return 0
+
+
+def decode_post(item, index):
+    """把信息流接口中的一条帖子转换为与DOM提取相同的 post_data 结构"""
+    owner = item.get("owner") or item.get("author") or {}
+    text = _first(item, POST_TEXT_KEYS, "")
+    if not isinstance(text, str):
+        text = json.dumps(text, ensure_ascii=False)
+
+    tags = []
+    for topic in item.get("topics") or item.get("tags") or []:
+        name = topic.get("name") if isinstance(topic, dict) else topic
+        if name:
+            tags.append(name if name.startswith("#") else f"#{name}")
+
+    emojis = {}
+    reactions = item.get("reactions") or item.get("emojis") or []
+    if isinstance(reactions, dict):
+        emojis = {key: parse_count(value) for key, value in reactions.items()}
+    else:
+        for reaction in reactions:
+            if isinstance(reaction, dict):
+                emoji_type = _first(reaction, ("type", "emoji", "name"))
+                if emoji_type:
+                    emojis[str(emoji_type)] = parse_count(_first(reaction, ("count", "num"), 0))
+
+    post_time = _first(item, POST_TIME_KEYS)
+    return {
+        "post_id": str(_first(item, POST_ID_KEYS)),
+        "index": str(index),
+        "time": str(post_time) if post_time is not None else None,
+        "author": {
+            "username": _first(owner, ("nickname", "username", "name"), "Unknown"),
+            "avatar": _first(owner, ("avatar", "avatarUrl", "avatarId"))
+        },
+        "content": {
+            "text": text.strip(),
+            "images": _image_urls(item.get("images") or item.get("photos")),
+            "tags": tags
+        },
+        "interaction": {
+            "views": parse_count(_first(item, VIEW_KEYS, 0)),
+            "comments": parse_count(_first(item, COMMENT_KEYS, 0)),
+            "emojis": emojis
+        },
+        "crawl_time": datetime.now().isoformat()
+    }
+
+
+def decode_article(item, base_url):
+    """把信息流接口中的一篇文章转换为 article_data 结构，content 可能为空"""
+    url = _first(item, ARTICLE_URL_KEYS)
+    if not url and item.get("id"):
+        url = f"{base_url.rstrip('/')}/{item['id']}/"
+    author = item.get("author") or item.get("owner") or {}
+    if isinstance(author, dict):
+        author = _first(author, ("nickname", "username", "name"), "")
+    content = _first(item, ("content", "body", "text"), "")
+    return {
+        "title": str(_first(item, ARTICLE_TITLE_KEYS, "")).strip(),
+        "author": author,
+        "date": str(_first(item, ("releasedAt", "publishTime", "createTime", "date"), "")),
+        "content": content if isinstance(content, str) else "",
+        "images": _image_urls(item.get("images") or ([item["cover"]] if item.get("cover") else [])),
+        "tags": [tag.get("name") if isinstance(tag, dict) else tag for tag in item.get("tags") or []],
+        "views": parse_count(_first(item, VIEW_KEYS, 0)),
+        "comments": parse_count(_first(item, COMMENT_KEYS, 0)),
+        "url": url,
+        "crawl_time": datetime.now().isoformat()
+    }
+
+
+class FeedHarvester:
+    """监听页面自身的JSON信息流响应，直接从接口数据解码帖子和文章
+
+    需要在 page.goto 之前创建，以便捕获首屏请求。之后可以通过 next_page()
+    复用最后一次信息流请求（同一上下文的Cookie）继续翻页，而无需滚动DOM。
+    """
+
+    def __init__(self, page, url_patterns, max_pages=50, rate_limiter=None):
+        self.page = page
+        self.rate_limiter = rate_limiter
+        self.url_patterns = list(url_patterns)
+        self.max_pages = max_pages
+        self.responses_seen = 0
+        self.pages_fetched = 0
+        self._posts = {}
+        self._articles = {}
+        self._last_request = None
+        self._last_payload = None
+        page.on("response", self._on_response)
+
+    def _matches(self, url):
+        return any(pattern in url for pattern in self.url_patterns)
+
+    def _on_response(self, response):
+        if not self._matches(response.url):
+            return
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        try:
+            payload = response.json()
+        except Exception as e:
+            logger.debug("解析信息流响应失败 %s: %s", response.url, e)
+            return
+        if self._ingest(payload):
+            self._last_request = {
+                "url": response.request.url,
+                "method": response.request.method,
+                "body": response.request.post_data
+            }
+
+    def _ingest(self, payload):
+        """解码一次响应，返回其中是否包含帖子或文章"""
+        self.responses_seen += 1
+        found = False
+        posts = _find_list(payload, _is_post)
+        if posts:
+            found = True
+            for item in posts:
+                post = decode_post(item, len(self._posts))
+                self._posts.setdefault(post["post_id"], post)
+        articles = _find_list(payload, _is_article)
+        if articles:
+            found = True
+            base_url = f"{urlparse(self.page.url).scheme}://{urlparse(self.page.url).netloc}/community/articles"
+            for item in articles:
+                article = decode_article(item, base_url)
+                if article["url"]:
+                    self._articles.setdefault(article["url"], article)
+        if found:
+            self._last_payload = payload
+        return found
+
+    def has_feed(self):
+        """是否已捕获到包含帖子或文章的信息流响应"""
+        return self._last_request is not None
+
+    def _next_request(self):
+        """根据上一次请求和响应推算下一页请求，无法推算时返回 None"""
+        request = self._last_request
+        cursor = _find_key(self._last_payload, CURSOR_KEYS)
+
+        def advance(params):
+            for key in PAGE_KEYS:
+                if key in params:
+                    params[key] = int(params[key]) + 1
+                    return True
+            for key in CURSOR_KEYS:
+                if key in params and cursor is not None:
+                    params[key] = cursor
+                    return True
+            return False
+
+        if request["method"] == "POST" and request["body"]:
+            try:
+                body = json.loads(request["body"])
+            except ValueError:
+                return None
+            if not isinstance(body, dict) or not advance(body):
+                return None
+            return request["url"], "POST", body
+
+        parsed = urlparse(request["url"])
+        params = dict(parse_qsl(parsed.query))
+        if not advance(params):
+            return None
+        return urlunparse(parsed._replace(query=urlencode(params))), "GET", None
+
+    def next_page(self):
+        """请求下一页信息流，返回新增条目数"""
+        if not self.has_feed() or self.pages_fetched >= self.max_pages:
+            return 0
+        next_request = self._next_request()
+        if not next_request:
+            logger.info("无法从信息流请求推算下一页参数")
+            return 0
+
+        url, method, body = next_request
+        before = len(self._posts) + len(self._articles)
+        if method == "POST":
+            send = lambda: self.page.request.post(url, data=body)
+        else:
+            send = lambda: self.page.request.get(url)
+        response = self.rate_limiter.call(url, send) if self.rate_limiter else send()
+        self.pages_fetched += 1
+        if not response.ok:
+            logger.warning("信息流翻页请求失败: %s %s", response.status, url)
+            return 0
+
+        if self._ingest(response.json()):
+            self._last_request = {
+                "url": url,
+                "method": method,
+                "body": json.dumps(body) if body is not None else None
+            }
+        return len(self._posts) + len(self._articles) - before
+
+    def collect_posts(self, target_count, stop_check=None):
+        """翻页直到获取 target_count 条帖子、stop_check(已获取帖子) 为真或信息流结束"""
+        while len(self._posts) < target_count:
+            if stop_check and stop_check(list(self._posts.values())):
+                break
+            if not self.next_page():
+                break
+        return list(self._posts.values())[:target_count]
+
+    def collect_articles(self, target_count, stop_check=None):
+        """翻页直到获取 target_count 篇文章、stop_check(已获取文章) 为真或信息流结束"""
+        while len(self._articles) < target_count:
+            if stop_check and stop_check(list(self._articles.values())):
+                break
+            if not self.next_page():
+                break
+        return list(self._articles.values())[:target_count]
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("image-cache")
+
+DEFAULT_HEADERS = {
+    "User-Agent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+}
+
+
+class ImageCache:
+    """按内容寻址的本地图片缓存
+
+    图片内容按 SHA-256 保存在 objects/ 下，相同内容只存一份；索引记录每个URL
+    对应的哈希和 ETag/Last-Modified。URL在 max_age 秒内直接使用缓存，过期后带
+    If-None-Match/If-Modified-Since 条件请求，304 时沿用缓存。总大小超过
+    max_bytes 时按最近访问时间淘汰。爬虫和各发布器通过 get_instance() 共用。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = ImageCache(os.getenv('DATA_SAVE_PATH', './data'))
+            return cls._instance
+
+    def __init__(self, data_path, dirname="image_cache", max_bytes=None, max_age=None, timeout=15):
+        self.root = os.path.join(data_path, dirname)
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.index_path = os.path.join(self.root, "index.json")
+        self.max_bytes = max_bytes or int(float(os.getenv('IMAGE_CACHE_MAX_MB', '200')) * 1024 * 1024)
+        self.max_age = max_age if max_age is not None else int(os.getenv('IMAGE_CACHE_MAX_AGE', '86400'))
+        self.timeout = timeout
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+        self.stats = {"hits": 0, "revalidated": 0, "downloads": 0, "bytes_downloaded": 0, "stale": 0, "evictions": 0}
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return {"urls": index.get("urls", {}), "objects": index.get("objects", {})}
+        except (OSError, json.JSONDecodeError):
+            return {"urls": {}, "objects": {}}
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _cached_entry(self, url):
+        """返回URL的索引项；对应的内容文件已被删除时视为未缓存"""
+        entry = self.index["urls"].get(url)
+        if entry and entry["sha256"] in self.index["objects"] and os.path.exists(self._object_path(entry["sha256"])):
+            return entry
+        return None
+
+    def _result(self, url, entry, source):
+        self.index["objects"][entry["sha256"]]["last_access"] = time.time()
+        return {
+            "url": url,
+            "path": self._object_path(entry["sha256"]),
+            "sha256": entry["sha256"],
+            "content_type": entry.get("content_type") or "image/jpeg",
+            "size": self.index["objects"][entry["sha256"]]["size"],
+            "source": source,
+        }
+
+    def _store(self, url, response):
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if digest not in self.index["objects"] or not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            self.index["objects"][digest] = {"size": len(content), "last_access": time.time()}
+        entry = {
+            "sha256": digest,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "checked_at": time.time(),
+        }
+        self.index["urls"][url] = entry
+        self.stats["downloads"] += 1
+        self.stats["bytes_downloaded"] += len(content)
+        return entry
+
+    def _evict(self, keep=None):
+        """总大小超过上限时按最近访问时间淘汰内容（keep 除外），并删除指向它们的URL"""
+        objects = self.index["objects"]
+        total = sum(item["size"] for item in objects.values())
+        if total <= self.max_bytes:
+            return
+        evicted = set()
+        for digest, item in sorted(objects.items(), key=lambda pair: pair[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(self._object_path(digest))
+            except OSError:
+                pass
+            total -= item["size"]
+            evicted.add(digest)
+        for digest in evicted:
+            del objects[digest]
+        self.index["urls"] = {url: entry for url, entry in self.index["urls"].items() if entry["sha256"] not in evicted}
+        self.stats["evictions"] += len(evicted)
+        logger.info("图片缓存淘汰 %d 个文件", len(evicted))
+
+    def fetch(self, url, revalidate=False, save=True):
+        """获取图片，返回包含本地路径、sha256 和 content_type 的字典
+
+        缓存未过期时不发请求；revalidate 为真时强制条件请求。
+        网络失败但有旧缓存时返回旧缓存。下载在锁外进行，save 为假时不写索引文件，
+        由调用方批量处理完后统一保存。
+        """
+        with self._lock:
+            entry = self._cached_entry(url)
+            if entry and not revalidate and time.time() - entry.get("checked_at", 0) < self.max_age:
+                self.stats["hits"] += 1
+                return self._result(url, entry, "cache")
+
+            headers = {}
+            if entry:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        error = None
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+            elif not headers:
+                raise requests.exceptions.HTTPError(f"304 without conditional request: {url}", response=response)
+        except requests.exceptions.RequestException as e:
+            response, error = None, e
+
+        with self._lock:
+            # 下载期间缓存项可能已被其他线程更新或淘汰
+            entry = self._cached_entry(url)
+            if error is not None:
+                if not entry:
+                    raise error
+                logger.warning("图片请求失败，使用旧缓存 %s: %s", url, error)
+                self.stats["stale"] += 1
+                source = "stale"
+            elif response.status_code == 304 and entry:
+                entry["checked_at"] = time.time()
+                self.stats["revalidated"] += 1
+                source = "revalidated"
+            elif response.status_code == 304:
+                source = None
+            else:
+                entry = self._store(url, response)
+                source = "download"
+
+            if source is not None:
+                result = self._result(url, entry, source)
+                self._evict(keep=entry["sha256"])
+                if save:
+                    self._save_index()
+                return result
+
+        # 条件请求返回304，但缓存内容在下载期间已被淘汰，重新完整下载
+        return self.fetch(url, revalidate, save)
+
+    def get_bytes(self, url, revalidate=False):
+        """获取图片内容和 content_type"""
+        asset = self.fetch(url, revalidate)
+        with open(asset["path"], 'rb') as f:
+            return f.read(), asset["content_type"]
+
+    def prefetch(self, urls):
+        """批量缓存图片，跳过失败的URL，返回成功数量；索引文件在最后保存一次"""
+        count = 0
+        for url in dict.fromkeys(urls):
+            try:
+                self.fetch(url, save=False)
+                count += 1
+            except Exception as e:
+                logger.debug("缓存图片失败 %s: %s", url, e)
+        with self._lock:
+            self._save_index()
+        return count
+
+    def get_stats(self):
+        with self._lock:
+            return dict(
+                self.stats,
+                objects=len(self.index["objects"]),
+                bytes=sum(item["size"] for item in self.index["objects"].values())
+            )
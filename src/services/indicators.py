@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import logging
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from .price_history import RESOLUTIONS
+
+logger = logging.getLogger("indicators")
+
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_PERIOD, BOLLINGER_WIDTH = 20, 2.0
+MA_PERIODS = (20, 50, 200)
+SWING_WINDOW = 3  # 左右各3根K线内的最高/最低点视为摆动高/低点
+SWING_LOOKBACK = 120
+
+
+def _ewm_continue(values, alpha, seed=None):
+    """指数平滑；seed 为上次的平滑值时从它继续计算，结果与一次性计算全部数据一致"""
+    series = pd.Series(values, dtype="f8")
+    if seed is None:
+        return series.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    series = pd.concat([pd.Series([seed], dtype="f8"), series], ignore_index=True)
+    return series.ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def _fold(state, bars):
+    """把新的K线折叠进递推状态（EMA、MACD、Wilder平滑的RSI和ATR）"""
+    close, high, low = bars["close"], bars["high"], bars["low"]
+    prev_close = np.r_[state.get("prev_close", close[0]), close[:-1]]
+
+    delta = close - prev_close
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    ema_fast = _ewm_continue(close, 2 / (MACD_FAST + 1), state.get("ema_fast"))
+    ema_slow = _ewm_continue(close, 2 / (MACD_SLOW + 1), state.get("ema_slow"))
+    signal = _ewm_continue(ema_fast - ema_slow, 2 / (MACD_SIGNAL + 1), state.get("signal"))
+
+    return {
+        "ts": int(bars["ts"][-1]),
+        "count": state.get("count", 0) + len(bars),
+        "prev_close": float(close[-1]),
+        "ema_fast": float(ema_fast[-1]),
+        "ema_slow": float(ema_slow[-1]),
+        "signal": float(signal[-1]),
+        "avg_gain": float(_ewm_continue(np.clip(delta, 0, None), 1 / RSI_PERIOD, state.get("avg_gain"))[-1]),
+        "avg_loss": float(_ewm_continue(np.clip(-delta, 0, None), 1 / RSI_PERIOD, state.get("avg_loss"))[-1]),
+        "atr": float(_ewm_continue(true_range, 1 / ATR_PERIOD, state.get("atr"))[-1]),
+    }
+
+
+def _round(value):
+    if value is None or not np.isfinite(value):
+        return None
+    return float(f"{value:.6g}")
+
+
+def _swing_levels(bars, price):
+    """由摆动高/低点得到当前价格下方最近的支撑位和上方最近的阻力位"""
+    size = 2 * SWING_WINDOW + 1
+    if len(bars) < size:
+        return [], []
+    highs = bars["high"][SWING_WINDOW:-SWING_WINDOW]
+    lows = bars["low"][SWING_WINDOW:-SWING_WINDOW]
+    swing_highs = highs[highs >= sliding_window_view(bars["high"], size).max(axis=1)]
+    swing_lows = lows[lows <= sliding_window_view(bars["low"], size).min(axis=1)]
+    supports = np.unique(swing_lows[swing_lows < price])[::-1][:2]
+    resistances = np.unique(swing_highs[swing_highs > price])[:2]
+    return [_round(v) for v in supports], [_round(v) for v in resistances]
+
+
+class IndicatorEngine:
+    """基于价格历史K线的技术指标计算
+
+    EMA/MACD/RSI/ATR 为递推指标，已收盘K线的平滑状态持久化在 state 文件中，
+    新K线到达时只折叠新增部分；尚未收盘的最后一根K线只参与本次快照计算，不写入状态。
+    均线、布林带和摆动支撑/阻力按最近窗口向量化计算。
+    """
+
+    def __init__(self, history, resolution="1h", state_file="indicator_state.json"):
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+        self.history = history
+        self.resolution = resolution
+        self.seconds = RESOLUTIONS[resolution]
+        self.state_path = os.path.join(os.path.dirname(history.root), state_file)
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get(self.resolution, {})
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("指标状态读取失败，将重新计算: %s", e)
+            return {}
+
+    def save_state(self):
+        data = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                data = {}
+        data[self.resolution] = self.state
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _pivots(self, symbol, now):
+        """由上一根已收盘日线计算经典枢轴点"""
+        daily = self.history.bars(symbol, "1d", limit=2)
+        daily = daily[daily["ts"] + RESOLUTIONS["1d"] <= now]
+        if len(daily) == 0:
+            return None
+        high, low, close = daily["high"][-1], daily["low"][-1], daily["close"][-1]
+        pivot = (high + low + close) / 3
+        return {
+            "P": _round(pivot),
+            "R1": _round(2 * pivot - low),
+            "S1": _round(2 * pivot - high),
+            "R2": _round(pivot + high - low),
+            "S2": _round(pivot - high + low),
+        }
+
+    def update(self, symbol, now=None):
+        """折叠新收盘的K线并返回该币种的最新指标快照；没有K线时返回 None"""
+        symbol = symbol.upper()
+        now = time.time() if now is None else now
+        state = self.state.get(symbol, {})
+
+        new_bars = self.history.bars(symbol, self.resolution, start=state["ts"] + 1 if state else None)
+        closed = new_bars[new_bars["ts"] + self.seconds <= now]
+        if len(closed):
+            state = _fold(state, closed)
+            self.state[symbol] = state
+
+        forming = new_bars[new_bars["ts"] + self.seconds > now]
+        current = _fold(state, forming) if len(forming) else state
+        if not current:
+            return None
+
+        window = self.history.bars(symbol, self.resolution, limit=max(MA_PERIODS[-1], SWING_LOOKBACK))
+        closes = window["close"]
+        price = current["prev_close"]
+        count = current["count"]
+        macd = current["ema_fast"] - current["ema_slow"]
+
+        snapshot = {
+            "symbol": symbol,
+            "resolution": self.resolution,
+            "bar_ts": current["ts"],
+            "bars": count,
+            "price": _round(price),
+        }
+        for period in MA_PERIODS:
+            snapshot[f"sma{period}"] = _round(closes[-period:].mean()) if len(closes) >= period else None
+        if count > RSI_PERIOD:
+            rs_loss = current["avg_loss"]
+            snapshot["rsi14"] = _round(100.0 if rs_loss == 0 else 100 - 100 / (1 + current["avg_gain"] / rs_loss))
+        else:
+            snapshot["rsi14"] = None
+        if count >= MACD_SLOW + MACD_SIGNAL:
+            snapshot["macd"] = {
+                "macd": _round(macd),
+                "signal": _round(current["signal"]),
+                "hist": _round(macd - current["signal"]),
+            }
+        else:
+            snapshot["macd"] = None
+        if len(closes) >= BOLLINGER_PERIOD:
+            tail = closes[-BOLLINGER_PERIOD:]
+            middle, std = tail.mean(), tail.std()
+            snapshot["bollinger"] = {
+                "upper": _round(middle + BOLLINGER_WIDTH * std),
+                "middle": _round(middle),
+                "lower": _round(middle - BOLLINGER_WIDTH * std),
+            }
+        else:
+            snapshot["bollinger"] = None
+        snapshot["atr14"] = _round(current["atr"]) if count > ATR_PERIOD else None
+        snapshot["pivots"] = self._pivots(symbol, now)
+        snapshot["support"], snapshot["resistance"] = _swing_levels(window[-SWING_LOOKBACK:], price)
+        return snapshot
+
+    def update_all(self, symbols=None, now=None):
+        """批量计算多个币种（默认价格历史中的全部币种），并保存递推状态"""
+        snapshots = {}
+        for symbol in symbols or self.history.symbols():
+            snapshot = self.update(symbol, now)
+            if snapshot:
+                snapshots[snapshot["symbol"]] = snapshot
+        self.save_state()
+        return snapshots
+
+
+def format_indicators(snapshots):
+    """把指标快照压缩为每个币种一行的文本，用于分析提示词"""
+    lines = []
+    for snapshot in snapshots:
+        parts = [f"{snapshot['symbol']}({snapshot['resolution']}, {snapshot['bars']}根K线) 价格={snapshot['price']}"]
+        if snapshot.get("rsi14") is not None:
+            parts.append(f"RSI14={snapshot['rsi14']}")
+        if snapshot.get("macd"):
+            macd = snapshot["macd"]
+            parts.append(f"MACD={macd['macd']}/信号{macd['signal']}/柱{macd['hist']}")
+        mas = [f"{period}:{snapshot[f'sma{period}']}" for period in MA_PERIODS if snapshot.get(f"sma{period}") is not None]
+        if mas:
+            parts.append("SMA=" + ",".join(mas))
+        if snapshot.get("bollinger"):
+            bands = snapshot["bollinger"]
+            parts.append(f"布林={bands['lower']}/{bands['middle']}/{bands['upper']}")
+        if snapshot.get("atr14") is not None:
+            parts.append(f"ATR14={snapshot['atr14']}")
+        if snapshot.get("pivots"):
+            pivots = snapshot["pivots"]
+            parts.append(f"枢轴P={pivots['P']} S1={pivots['S1']} S2={pivots['S2']} R1={pivots['R1']} R2={pivots['R2']}")
+        if snapshot.get("support"):
+            parts.append("支撑=" + ",".join(map(str, snapshot["support"])))
+        if snapshot.get("resistance"):
+            parts.append("阻力=" + ",".join(map(str, snapshot["resistance"])))
+        lines.append(" ".join(parts))
+    return "\n".join(lines)
@@ -0,0 +1,108 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger("jsonl-store")
+
+
+def _repair_tail(filepath):
+    """截掉崩溃时写了一半的最后一行，保证后续追加从新行开始"""
+    with open(filepath, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+
+        # 向前查找最后一个换行符
+        position = size
+        keep = 0
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                keep = position + newline + 1
+                break
+        logger.warning("修复未写完的记录: %s (截断 %d 字节)", filepath, size - keep)
+        f.truncate(keep)
+
+
+class JsonlWriter:
+    """追加写入的JSONL文件
+
+    每条记录一行，写入后立即flush到操作系统，每 fsync_every 条记录以及关闭时
+    fsync 一次落盘。打开时会修复上次崩溃留下的半行记录。
+    """
+
+    def __init__(self, filepath, fsync_every=20):
+        self.filepath = filepath
+        self.fsync_every = max(1, fsync_every)
+        self._pending = 0
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        if os.path.exists(filepath):
+            _repair_tail(filepath)
+        self._file = open(filepath, 'a', encoding='utf-8')
+
+    def append(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def sync(self):
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_jsonl(filepath):
+    """逐行流式读取JSONL，跳过未写完或损坏的行"""
+    if not os.path.exists(filepath):
+        return
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.endswith('\n'):
+                logger.warning("跳过未写完的记录: %s 第 %d 行", filepath, line_no)
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("跳过损坏的记录: %s 第 %d 行", filepath, line_no)
+
+
+def write_jsonl(filepath, records):
+    """原子地用 records 重写整个文件（先写临时文件再替换）"""
+    tmp_path = filepath + '.tmp'
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
@@ -0,0 +1,116 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("llm-cache")
+
+# 提示词头部每次都会变化的"分析时间"行不参与缓存键；数据中的时间戳保留，数据变化时键也随之变化
+VOLATILE_LINE_PATTERN = re.compile(r"^[ \t]*- 分析时间：.*$", re.MULTILINE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_prompt(text):
+    """去掉分析时间行并合并空白，缩进或换行不同的相同提示词得到相同的键"""
+    return WHITESPACE_PATTERN.sub(" ", VOLATILE_LINE_PATTERN.sub("", text)).strip()
+
+
+def prompt_fingerprint(model, temperature, messages):
+    """模型、温度和规范化后的消息的 SHA-256"""
+    payload = {
+        "model": model,
+        "temperature": round(float(temperature), 4),
+        "messages": [[message["role"], normalize_prompt(message["content"])] for message in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """大模型响应的磁盘缓存
+
+    每条响应保存为 llm_cache/<指纹>.json，超过 ttl 秒视为过期；总大小超过
+    max_bytes 时按最近使用时间（文件修改时间）淘汰。多个进程共用目录也是安全的。
+    """
+
+    def __init__(self, data_path, dirname="llm_cache", ttl=None, max_bytes=None, enabled=None):
+        self.root = os.path.join(data_path, dirname)
+        self.ttl = ttl if ttl is not None else int(os.getenv('LLM_CACHE_TTL', '86400'))
+        self.max_bytes = max_bytes or int(float(os.getenv('LLM_CACHE_MAX_MB', '50')) * 1024 * 1024)
+        self.enabled = enabled if enabled is not None else os.getenv('LLM_CACHE', 'true').lower() == 'true'
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "expired": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.root, key + ".json")
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def record_bypass(self):
+        self._count("bypassed")
+
+    def get(self, key):
+        """返回未过期的缓存内容，没有时返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._count("misses")
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._count("expired")
+            self._count("misses")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)  # 记录最近使用时间，用于淘汰
+        except OSError:
+            pass
+        self._count("hits")
+        return entry["content"]
+
+    def put(self, key, content, meta=None):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(meta or {}, created=time.time(), content=content), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._count("writes")
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                continue
+            total -= size
+            self._count("evictions")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
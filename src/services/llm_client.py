@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from .rate_limiter import RETRY_STATUSES, retry_after_seconds
+
+logger = logging.getLogger("llm-client")
+
+
+class LLMError(Exception):
+    """大模型接口多次重试后仍然失败"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMClient:
+    """OpenAI兼容的对话补全接口客户端
+
+    复用连接池，设置连接/读取超时；遇到 429/5xx、超时或连接错误时按指数退避加
+    随机抖动重试（遵循 Retry-After）。每次调用记录耗时和响应中的 token 用量。
+    """
+
+    def __init__(self, api_base, api_key, connect_timeout=None, read_timeout=None, max_attempts=None,
+                 base_delay=2.0, max_delay=60.0, stream_usage=None):
+        self.api_base = api_base.rstrip('/')
+        self.connect_timeout = connect_timeout or float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))
+        self.read_timeout = read_timeout or float(os.getenv('LLM_READ_TIMEOUT', '180'))
+        self.max_attempts = max(1, max_attempts or int(os.getenv('LLM_MAX_ATTEMPTS', '3')))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # 流式请求是否带 stream_options.include_usage；部分兼容接口不支持该字段，返回400时自动关闭
+        self.stream_usage = stream_usage if stream_usage is not None else os.getenv('LLM_STREAM_USAGE', 'true').lower() == 'true'
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        })
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "seconds": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "last_call": None,
+        }
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _record(self, started, attempts, usage=None, error=None, first_token=None):
+        seconds = time.monotonic() - started
+        usage = usage or {}
+        call = {
+            "seconds": round(seconds, 2),
+            "attempts": attempts,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+        if first_token is not None:
+            call["first_token_seconds"] = round(first_token, 2)
+        if error:
+            call["error"] = error
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["retries"] += attempts - 1
+            self.stats["seconds"] += seconds
+            if error:
+                self.stats["failures"] += 1
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                self.stats[key] += call[key]
+            self.stats["last_call"] = call
+        return call
+
+    def chat(self, payload):
+        """发送对话补全请求，返回完整的响应JSON；重试用尽后抛出 LLMError"""
+        started = time.monotonic()
+        response, attempts = self._post(payload, started)
+        result = response.json()
+        call = self._record(started, attempts, result.get("usage"))
+        logger.info("大模型调用耗时 %.2f 秒，token: 输入 %d / 输出 %d",
+                    call["seconds"], call["prompt_tokens"], call["completion_tokens"])
+        return result
+
+    def chat_stream(self, payload):
+        """以 stream 模式请求，逐段产出生成的文本
+
+        只在收到响应之前重试；开始输出后连接中断时抛出 LLMError。token 用量由
+        stream_options.include_usage 请求，在 choices 为空的最后一个数据块中返回；
+        接口不支持该字段（返回400）时去掉它重试一次，之后的请求不再发送。
+        """
+        started = time.monotonic()
+        if self.stream_usage:
+            try:
+                response, attempts = self._post(dict(payload, stream=True, stream_options={"include_usage": True}),
+                                                started, stream=True)
+            except LLMError as e:
+                if e.status_code != 400:
+                    raise
+                logger.warning("大模型接口不支持 stream_options，去掉后重试: %s", e)
+                self.stream_usage = False
+                started = time.monotonic()
+                response, attempts = self._post(dict(payload, stream=True), started, stream=True)
+        else:
+            response, attempts = self._post(dict(payload, stream=True), started, stream=True)
+        first_token = None
+        usage = None
+        response.encoding = "utf-8"  # text/event-stream 没有声明字符集时 requests 默认按 ISO-8859-1 解码
+        try:
+            with response:
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    for choice in chunk.get("choices") or []:
+                        text = (choice.get("delta") or {}).get("content")
+                        if text:
+                            if first_token is None:
+                                first_token = time.monotonic() - started
+                            yield text
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            self._record(started, attempts, usage, error=str(e), first_token=first_token)
+            raise LLMError(f"流式响应中断: {e}") from e
+        call = self._record(started, attempts, usage, first_token=first_token)
+        logger.info("大模型流式调用耗时 %.2f 秒，首个token %.2f 秒", call["seconds"], call.get("first_token_seconds", 0))
+
+    def _post(self, payload, started, stream=False):
+        """发送请求并对可重试的错误退避重试，返回 (响应, 尝试次数)"""
+        url = f"{self.api_base}/chat/completions"
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            try:
+                response = self.session.post(url, json=payload, stream=stream,
+                                             timeout=(self.connect_timeout, self.read_timeout))
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if last_attempt:
+                    self._record(started, attempt + 1, error=str(e))
+                    raise LLMError(f"请求失败: {e}") from e
+                delay = self._backoff_delay(attempt)
+                logger.warning("大模型请求超时或连接失败，%.1f 秒后重试 (%d/%d): %s", delay, attempt + 1, self.max_attempts, e)
+            else:
+                if response.status_code < 400:
+                    return response, attempt + 1
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    self._record(started, attempt + 1, error=f"HTTP {response.status_code}")
+                    raise LLMError(f"HTTP {response.status_code}: {response.text[:500]}", response.status_code)
+                delay = self._backoff_delay(attempt, retry_after_seconds(response))
+                response.close()
+                logger.warning("大模型接口返回 %s，%.1f 秒后重试 (%d/%d)", response.status_code, delay, attempt + 1, self.max_attempts)
+            time.sleep(delay)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["seconds"] = round(stats["seconds"], 2)
+        return stats
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,151 @@
+import time
+import logging
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger("page-waiter")
+
+
+class NetworkTracker:
+    """跟踪页面上匹配指定URL片段的请求"""
+
+    def __init__(self, page, url_patterns):
+        self.url_patterns = list(url_patterns)
+        self.in_flight = set()
+        self.last_activity = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _matches(self, request):
+        return any(pattern in request.url for pattern in self.url_patterns)
+
+    def _on_request(self, request):
+        if self._matches(request):
+            self.in_flight.add(request)
+            self.last_activity = time.monotonic()
+
+    def _on_done(self, request):
+        if request in self.in_flight:
+            self.in_flight.discard(request)
+            self.last_activity = time.monotonic()
+
+
+class PageWaiter:
+    """基于页面信号的等待，替代固定时长的 time.sleep
+
+    每个等待方法在信号满足时返回 True，超时返回 False（不抛出异常），
+    并按等待类型累计耗时，可通过 get_stats() 查看。
+    """
+
+    def __init__(self, default_timeout=10000, poll_interval=100):
+        self.default_timeout = default_timeout
+        self.poll_interval = poll_interval
+        self.stats = {}  # 按等待类型汇总，不保留每次的样本，常驻工作进程中不会无限增长
+        self._trackers = {}
+
+    def _record(self, name, started, ok):
+        elapsed = time.monotonic() - started
+        item = self.stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+        item["count"] += 1
+        item["total"] = round(item["total"] + elapsed, 3)
+        item["max"] = max(item["max"], round(elapsed, 3))
+        if not ok:
+            item["timeouts"] += 1
+        logger.debug("等待 %s %s，耗时 %.2f 秒", name, "完成" if ok else "超时", elapsed)
+        return ok
+
+    def wait_for_count_increase(self, page, selector, previous_count, timeout=None):
+        """等待匹配 selector 的元素数量超过 previous_count"""
+        started = time.monotonic()
+        try:
+            page.wait_for_function(
+                "([selector, previous]) => document.querySelectorAll(selector).length > previous",
+                arg=[selector, previous_count],
+                timeout=timeout or self.default_timeout,
+                polling=self.poll_interval
+            )
+            ok = True
+        except PlaywrightTimeoutError:
+            ok = False
+        return self._record("count_increase", started, ok)
+
+    def wait_for_index_advance(self, page, selector, last_index, timeout=None):
+        """等待出现 data-index 大于 last_index 的元素"""
+        started = time.monotonic()
+        try:
+            page.wait_for_function(
+                """([selector, last]) => Array.from(document.querySelectorAll(selector))
+                    .some(el => Number(el.getAttribute('data-index')) > last)""",
+                arg=[selector, int(last_index) if last_index is not None else -1],
+                timeout=timeout or self.default_timeout,
+                polling=self.poll_interval
+            )
+            ok = True
+        except PlaywrightTimeoutError:
+            ok = False
+        return self._record("index_advance", started, ok)
+
+    def watch_network(self, page, url_patterns):
+        """开始跟踪页面的指定请求，需要在 goto 之前调用"""
+        tracker = NetworkTracker(page, url_patterns)
+        self._trackers[page] = tracker
+        page.on("close", lambda _: self._trackers.pop(page, None))
+        return tracker
+
+    def wait_for_network_quiet(self, page, quiet_ms=500, timeout=None):
+        """等待被跟踪的请求全部结束且静默 quiet_ms 毫秒"""
+        started = time.monotonic()
+        tracker = self._trackers.get(page)
+        if tracker is None:
+            logger.warning("页面未调用 watch_network，跳过网络静默等待")
+            return self._record("network_quiet", started, False)
+
+        deadline = started + (timeout or self.default_timeout) / 1000
+        ok = False
+        while time.monotonic() < deadline:
+            idle = time.monotonic() - tracker.last_activity
+            if not tracker.in_flight and idle * 1000 >= quiet_ms:
+                ok = True
+                break
+            # 使用 wait_for_timeout 让Playwright继续分发请求事件
+            page.wait_for_timeout(self.poll_interval)
+        return self._record("network_quiet", started, ok)
+
+    def wait_for_text_stable(self, target, selector=None, stable_ms=500, initial_length=None, timeout=None):
+        """等待文本长度稳定
+
+        target 可以是页面或元素，selector 为空时直接读取 target 本身的文本。
+        指定 initial_length 时，文本长度需先变化再稳定（如点击展开后）。
+        """
+        started = time.monotonic()
+        deadline = started + (timeout or self.default_timeout) / 1000
+        script = "el => el ? el.innerText.length : -1"
+        last_length = None
+        stable_since = None
+        ok = False
+        while time.monotonic() < deadline:
+            try:
+                if selector:
+                    length = target.eval_on_selector(selector, script)
+                elif hasattr(target, "goto"):
+                    length = target.evaluate("() => document.body ? document.body.innerText.length : -1")
+                else:
+                    length = target.evaluate(script)
+            except Exception:
+                length = -1
+
+            now = time.monotonic()
+            changed = initial_length is None or length != initial_length
+            if length > 0 and changed and length == last_length:
+                if (now - stable_since) * 1000 >= stable_ms:
+                    ok = True
+                    break
+            else:
+                stable_since = now
+            last_length = length
+            time.sleep(self.poll_interval / 1000)
+        return self._record("text_stable", started, ok)
+
+    def get_stats(self):
+        """按等待类型汇总次数、总耗时、最大耗时和超时次数"""
+        return {name: dict(item) for name, item in self.stats.items()}
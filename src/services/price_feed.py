@@ -0,0 +1,100 @@
+import os
+import re
+import json
+import logging
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("price-feed")
+
+SYMBOL_PATTERN = re.compile(r"\$([A-Z][A-Z0-9]{1,9})\b")
+
+
+class PriceFeed:
+    """通过JSON行情接口批量获取多个币种的价格
+
+    默认使用币安公开的 /api/v3/ticker/24hr 接口，一次请求返回多个交易对；
+    base_url 可配置，便于指向本地的测试桩服务。
+    """
+
+    def __init__(self, base_url=None, quote=None, timeout=10):
+        self.base_url = (base_url or os.getenv('PRICE_API_BASE', 'https://api.binance.com')).rstrip('/')
+        self.quote = quote or os.getenv('PRICE_QUOTE', 'USDT')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @staticmethod
+    def extract_symbols(posts):
+        """从帖子内容和标签中提取 $BTC 形式的币种符号，按出现顺序去重"""
+        symbols = []
+        for post in posts:
+            content = post.get("content", {})
+            text = content.get("text", "") if isinstance(content, dict) else str(content)
+            tags = content.get("tags", []) if isinstance(content, dict) else []
+            for symbol in SYMBOL_PATTERN.findall(" ".join([text] + tags)):
+                if symbol not in symbols:
+                    symbols.append(symbol)
+        return symbols
+
+    def _request(self, pairs):
+        response = self.session.get(
+            f"{self.base_url}/api/v3/ticker/24hr",
+            params={"symbols": json.dumps(pairs, separators=(',', ':'))},
+            timeout=self.timeout
+        )
+        return response
+
+    def _parse_ticker(self, ticker, timestamp):
+        symbol = ticker["symbol"]
+        if symbol.endswith(self.quote):
+            symbol = symbol[:-len(self.quote)]
+        return {
+            "symbol": symbol,
+            "pair": ticker["symbol"],
+            "price": float(ticker["lastPrice"]),
+            "change_24h": float(ticker["priceChangePercent"]),
+            "high_24h": float(ticker.get("highPrice", 0)),
+            "low_24h": float(ticker.get("lowPrice", 0)),
+            "volume_24h": float(ticker.get("volume", 0)),
+            "timestamp": timestamp
+        }
+
+    def fetch_prices(self, symbols):
+        """批量获取价格，返回 {符号: 行情}；接口不支持的符号会被跳过"""
+        symbols = [symbol.upper() for symbol in dict.fromkeys(symbols)]
+        if not symbols:
+            return {}
+        pairs = [f"{symbol}{self.quote}" for symbol in symbols]
+        timestamp = datetime.now().isoformat()
+
+        response = self._request(pairs)
+        if response.status_code == 400 and len(pairs) > 1:
+            # 批量请求中只要有一个无效交易对就会整体失败，逐个重试并跳过无效的
+            logger.info("批量行情请求失败，逐个重试: %s", response.text[:200])
+            tickers = []
+            for pair in pairs:
+                single = self._request([pair])
+                if single.ok:
+                    tickers.extend(single.json())
+                else:
+                    logger.debug("跳过无效交易对 %s", pair)
+        else:
+            response.raise_for_status()
+            tickers = response.json()
+
+        prices = {}
+        for ticker in tickers:
+            try:
+                item = self._parse_ticker(ticker, timestamp)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("解析行情数据失败 %s: %s", ticker, e)
+                continue
+            prices[item["symbol"]] = item
+        return prices
+
+    def close(self):
+        self.session.close()
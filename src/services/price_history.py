@@ -0,0 +1,194 @@
+import os
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("price-history")
+
+TICK_DTYPE = np.dtype([("ts", "f8"), ("price", "f8")])
+BAR_DTYPE = np.dtype([
+    ("ts", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("count", "i8"),
+])
+
+# K线周期及其秒数，按UTC对齐
+RESOLUTIONS = {
+    "1m": 60,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+
+def _aggregate(ticks, seconds):
+    """将按时间排序的tick聚合为K线"""
+    if len(ticks) == 0:
+        return np.empty(0, BAR_DTYPE)
+    price = ticks["price"]
+    buckets = (ticks["ts"] // seconds).astype(np.int64) * seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ticks)]
+
+    bars = np.empty(len(starts), BAR_DTYPE)
+    bars["ts"] = buckets[starts]
+    bars["open"] = price[starts]
+    bars["high"] = np.maximum.reduceat(price, starts)
+    bars["low"] = np.minimum.reduceat(price, starts)
+    bars["close"] = price[ends - 1]
+    bars["count"] = ends - starts
+    return bars
+
+
+class PriceHistory:
+    """按币种存储的列式价格历史
+
+    每个币种一个目录，tick 和各周期K线分别保存为只追加的原始二进制文件
+    （ticks.bin / bars_<周期>.bin，定长结构化记录）。追加 tick 时只写入新记录，
+    并从新 tick 所在周期开始重写K线文件的末尾，不会重新读写整个文件；读取时
+    使用内存映射，按时间二分查找切片。旧版本的 .npy 文件在首次访问时自动迁移。
+    """
+
+    def __init__(self, data_path, dirname="price_history"):
+        self.root = os.path.join(data_path, dirname)
+        os.makedirs(self.root, exist_ok=True)
+        self._migrated = set()
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, name, ext="bin"):
+        return os.path.join(self.root, symbol.upper(), f"{name}.{ext}")
+
+    def _migrate(self, symbol):
+        """把旧版本的 .npy 数组转换为原始二进制文件"""
+        symbol = symbol.upper()
+        if symbol in self._migrated:
+            return
+        for name in ["ticks"] + [f"bars_{resolution}" for resolution in RESOLUTIONS]:
+            old_path = self._path(symbol, name, "npy")
+            if not os.path.exists(old_path):
+                continue
+            path = self._path(symbol, name)
+            if not os.path.exists(path):
+                try:
+                    array = np.load(old_path)
+                except (OSError, ValueError) as e:
+                    logger.warning("迁移价格历史失败 %s: %s", old_path, e)
+                    continue
+                tmp_path = path + '.tmp'
+                array.tofile(tmp_path)
+                os.replace(tmp_path, path)
+                logger.info("已迁移价格历史 %s (%d 条)", old_path, len(array))
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+        self._migrated.add(symbol)
+
+    def _read(self, symbol, name, dtype):
+        """以内存映射方式读取记录；末尾未写完的半条记录被忽略"""
+        path = self._path(symbol, name)
+        try:
+            count = os.path.getsize(path) // dtype.itemsize
+        except OSError:
+            return np.empty(0, dtype)
+        if count == 0:
+            return np.empty(0, dtype)
+        try:
+            return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+        except (OSError, ValueError) as e:
+            logger.warning("读取价格历史失败 %s: %s", path, e)
+            return np.empty(0, dtype)
+
+    def _write_tail(self, symbol, name, start, records):
+        """从第 start 条记录开始写入 records 并截断文件，start 等于记录数时即为追加"""
+        path = self._path(symbol, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab'):
+            pass
+        with open(path, 'r+b') as f:
+            offset = start * records.dtype.itemsize
+            f.seek(offset)
+            f.write(records.tobytes())
+            f.truncate(offset + records.nbytes)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append_ticks(self, symbol, timestamps, prices):
+        """追加一个币种的多个tick，timestamps 为秒级时间戳"""
+        new = np.empty(len(prices), TICK_DTYPE)
+        new["ts"] = np.asarray(timestamps, dtype="f8")
+        new["price"] = np.asarray(prices, dtype="f8")
+        new = new[np.isfinite(new["price"])]
+        if len(new) == 0:
+            return 0
+        new = np.sort(new, order="ts", kind="stable")
+
+        with self._lock:
+            self._migrate(symbol)
+            ticks = self._read(symbol, "ticks", TICK_DTYPE)
+            first_new = new["ts"][0]
+            # 乱序到达的tick：与其后的已有tick合并排序后重写文件末尾
+            position = np.searchsorted(ticks["ts"], first_new, side="right")
+            tail = np.concatenate([ticks[position:], new])
+            if position < len(ticks):
+                tail = tail[np.argsort(tail["ts"], kind="stable")]
+            del ticks
+            self._write_tail(symbol, "ticks", position, tail)
+
+            ticks = self._read(symbol, "ticks", TICK_DTYPE)
+            for resolution, seconds in RESOLUTIONS.items():
+                # 只重算新tick所在周期及之后的K线
+                bucket_start = int(first_new // seconds) * seconds
+                bars = self._read(symbol, f"bars_{resolution}", BAR_DTYPE)
+                kept = int(np.searchsorted(bars["ts"], bucket_start, side="left"))
+                del bars
+                tail = ticks[np.searchsorted(ticks["ts"], bucket_start, side="left"):]
+                self._write_tail(symbol, f"bars_{resolution}", kept, _aggregate(tail, seconds))
+            del ticks, tail
+        return len(new)
+
+    def append_prices(self, prices):
+        """追加 PriceFeed.fetch_prices 返回的一批行情"""
+        count = 0
+        for symbol, item in prices.items():
+            timestamp = datetime.fromisoformat(item["timestamp"]).timestamp()
+            count += self.append_ticks(symbol, [timestamp], [item["price"]])
+        return count
+
+    def symbols(self):
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def _slice(self, array, start=None, end=None, limit=None):
+        left = 0 if start is None else np.searchsorted(array["ts"], start, side="left")
+        right = len(array) if end is None else np.searchsorted(array["ts"], end, side="right")
+        if limit is not None:
+            left = max(left, right - limit)
+        return np.array(array[left:right])
+
+    def _series(self, symbol, name, dtype):
+        with self._lock:
+            self._migrate(symbol)
+        return self._read(symbol, name if name == "ticks" else f"bars_{name}", dtype)
+
+    def ticks(self, symbol, start=None, end=None, limit=None):
+        """返回时间范围内的tick（结构化数组）"""
+        return self._slice(self._series(symbol, "ticks", TICK_DTYPE), start, end, limit)
+
+    def bars(self, symbol, resolution="1h", start=None, end=None, limit=None):
+        """返回指定周期的OHLC K线（结构化数组），start/end 为秒级时间戳"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+        return self._slice(self._series(symbol, resolution, BAR_DTYPE), start, end, limit)
+
+    def bars_frame(self, symbol, resolution="1h", start=None, end=None, limit=None):
+        """以 DataFrame 形式返回K线，索引为UTC时间"""
+        frame = pd.DataFrame(self.bars(symbol, resolution, start, end, limit))
+        frame.index = pd.to_datetime(frame.pop("ts"), unit="s", utc=True)
+        return frame
@@ -0,0 +1,236 @@
+import os
+import re
+import json
+import math
+import logging
+from .feed_harvester import parse_count
+
+try:
+    import tiktoken
+except ImportError:  # 未安装时按字符估算token数
+    tiktoken = None
+
+logger = logging.getLogger("prompt-builder")
+
+# 各模型用于帖子/文章列表的token预算（按模型名前缀匹配），可用 PROMPT_TOKEN_BUDGET 覆盖
+MODEL_BUDGETS = {
+    "gpt-4o": 24000,
+    "gpt-4": 6000,
+    "gpt-3.5": 6000,
+    "deepseek": 24000,
+    "qwen": 16000,
+}
+DEFAULT_BUDGET = 12000
+# 正文截断后至少保留的token数，预算不够时改为丢弃排在后面的条目
+MIN_BODY_TOKENS = 80
+
+CJK_PATTERN = re.compile("[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+_encodings = {}
+
+
+def _encoding(model):
+    """返回模型的分词器；首次使用需要下载BPE文件，加载失败（如离线）时缓存 None 并改为估算"""
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning("加载 %s 的分词器失败，按字符估算token数: %s", model, e)
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def count_tokens(text, model=None):
+    """计算文本的token数；没有可用的 tiktoken 分词器时中日韩字符按1个、其他字符按4个1个token估算"""
+    if not text:
+        return 0
+    encoding = _encoding(model or "gpt-4o")
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def model_budget(model):
+    budget = os.getenv('PROMPT_TOKEN_BUDGET')
+    if budget:
+        return int(budget)
+    name = (model or "").lower().split("/")[-1]
+    for prefix, tokens in MODEL_BUDGETS.items():
+        if name.startswith(prefix):
+            return tokens
+    return DEFAULT_BUDGET
+
+
+def _drop_empty(record):
+    return {key: value for key, value in record.items() if value not in (None, "", [], {}, 0)}
+
+
+def compact_post(post):
+    """帖子只保留分析需要的字段：正文、标签、互动数和重复次数
+
+    DOM提取的计数是页面文本（如 "1.2K"），统一转换为整数。
+    """
+    content = post.get("content") or {}
+    interaction = post.get("interaction") or {}
+    emojis = interaction.get("emojis") or {}
+    return _drop_empty({
+        "id": post.get("post_id"),
+        "time": post.get("time"),
+        "author": (post.get("author") or {}).get("username"),
+        "text": content.get("text", ""),
+        "tags": content.get("tags"),
+        "views": parse_count(interaction.get("views")),
+        "comments": parse_count(interaction.get("comments")),
+        "reactions": sum(parse_count(count) for count in emojis.values()),
+        "dup": post.get("duplicate_count") if post.get("duplicate_count", 1) > 1 else None,
+        "source": post.get("source"),
+    })
+
+
+def compact_article(article):
+    """文章去掉图片、链接和爬取时间，只保留标题、日期、标签、互动数和正文"""
+    return _drop_empty({
+        "title": article.get("title"),
+        "date": article.get("date"),
+        "author": article.get("author"),
+        "tags": article.get("tags"),
+        "views": parse_count(article.get("views")),
+        "comments": parse_count(article.get("comments")),
+        "content": article.get("content", ""),
+        "dup": article.get("duplicate_count") if article.get("duplicate_count", 1) > 1 else None,
+        "source": article.get("source"),
+    })
+
+
+# 每种数据的压缩函数和需要截断的正文字段
+COMPACTORS = {
+    "posts": (compact_post, "text"),
+    "articles": (compact_article, "content"),
+}
+
+
+class PromptBuilder:
+    """按token预算把帖子/文章序列化为紧凑的提示词片段
+
+    每条记录一行紧凑JSON，只包含分析需要的字段。总量超过预算时把过长的正文
+    截断到相同的上限；上限低于 MIN_BODY_TOKENS 时丢弃排在后面的条目。
+    """
+
+    def __init__(self, model, budget=None):
+        self.model = model
+        self.budget = budget or model_budget(model)
+
+    def count(self, text):
+        return count_tokens(text, self.model)
+
+    def truncate(self, text, limit):
+        """把文本截断到约 limit 个token"""
+        return self._truncate(text, self.count(text), limit)
+
+    def _truncate(self, text, tokens, limit):
+        """把正文截断到约 limit 个token"""
+        if tokens <= limit:
+            return text
+        encoding = _encoding(self.model)
+        if encoding is not None:
+            return encoding.decode(encoding.encode(text, disallowed_special=())[:limit]) + "…"
+        end = max(1, int(len(text) * limit / tokens))
+        while end > 1 and self.count(text[:end]) > limit:
+            end = int(end * 0.9)
+        return text[:end] + "…"
+
+    @staticmethod
+    def _render(record):
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+    def compact(self, items, kind):
+        """返回 [(压缩后的记录, 正文token数, 其余部分token数)]"""
+        compactor, body_field = COMPACTORS[kind]
+        records = []
+        for item in items:
+            record = compactor(item)
+            body = record.get(body_field, "")
+            body_tokens = self.count(body)
+            rest_tokens = self.count(self._render(dict(record, **{body_field: ""}))) + 1  # 换行
+            records.append((record, body_tokens, rest_tokens))
+        return records
+
+    def _body_limit(self, records, budget):
+        """找出使总token数不超过预算的最大正文上限，预算足够时返回 None"""
+        if self.total_tokens(records) <= budget:
+            return None
+        room = budget - sum(rest for _, _, rest in records)
+        if room <= 0:
+            return 0
+        lengths = sorted(body for _, body, _ in records)
+        # 正文较短的条目完整保留，剩余预算由较长的条目平分
+        for i, length in enumerate(lengths):
+            share = room // (len(lengths) - i)
+            if length > share:
+                return share
+            room -= length
+        return None
+
+    @staticmethod
+    def total_tokens(records):
+        return sum(body + rest for _, body, rest in records)
+
+    def fit(self, items, kind, budget=None, records=None):
+        """序列化 items，返回 (提示词片段, 统计信息)；records 为 compact() 的结果，可复用"""
+        budget = budget or self.budget
+        _, body_field = COMPACTORS[kind]
+        records = list(records) if records is not None else self.compact(items, kind)
+        limit = self._body_limit(records, budget)
+        while records and limit is not None and limit < MIN_BODY_TOKENS:
+            records.pop()
+            limit = self._body_limit(records, budget)
+
+        lines = []
+        truncated = 0
+        for record, body_tokens, _ in records:
+            if limit is not None and body_tokens > limit:
+                record = dict(record, **{body_field: self._truncate(record.get(body_field, ""), body_tokens, limit)})
+                truncated += 1
+            lines.append(self._render(record))
+        text = "\n".join(lines)
+        stats = {
+            "items": len(items),
+            "included": len(records),
+            "truncated": truncated,
+            "tokens": self.count(text),
+            "budget": budget,
+            "tokenizer": "tiktoken" if _encoding(self.model) is not None else "estimate",
+        }
+        logger.info("提示词%s: %d/%d 条，截断 %d 条，%d/%d tokens", kind, stats["included"], stats["items"],
+                    truncated, stats["tokens"], budget)
+        return text, stats
+
+    def chunks(self, items, kind, budget, records=None):
+        """按顺序把 items 装入多个不超过 budget 的片段，单条超出时截断其正文
+
+        返回 [(提示词片段, 条数)]，用于分批分析。
+        """
+        _, body_field = COMPACTORS[kind]
+        records = records if records is not None else self.compact(items, kind)
+        chunks = []
+        lines, used = [], 0
+        for record, body_tokens, rest_tokens in records:
+            if body_tokens + rest_tokens > budget:
+                limit = max(MIN_BODY_TOKENS, budget - rest_tokens)
+                record = dict(record, **{body_field: self._truncate(record.get(body_field, ""), body_tokens, limit)})
+                body_tokens = limit
+            if lines and used + body_tokens + rest_tokens > budget:
+                chunks.append(("\n".join(lines), len(lines)))
+                lines, used = [], 0
+            lines.append(self._render(record))
+            used += body_tokens + rest_tokens
+        if lines:
+            chunks.append(("\n".join(lines), len(lines)))
+        logger.info("提示词%s: %d 条分为 %d 批（每批不超过 %d tokens）", kind, len(records), len(chunks), budget)
+        return chunks
@@ -0,0 +1,187 @@
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import requests
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger("rate-limiter")
+
+# 可重试的响应状态；429/503 表示被限流，会让整个域名冷却并降低速率
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+TIMEOUT_ERRORS = (PlaywrightTimeoutError, requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+
+
+def _status_of(response):
+    """兼容 Playwright 的 Response/APIResponse 和 requests 的 Response"""
+    if response is None:
+        return None
+    status = getattr(response, "status", None)
+    return status if isinstance(status, int) else getattr(response, "status_code", None)
+
+
+def retry_after_seconds(response):
+    """解析 Retry-After 响应头（秒数或HTTP日期），没有时返回 None"""
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket:
+    def __init__(self, rate, burst):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.cooldown_until = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class HostRateLimiter:
+    """按域名共享的令牌桶限速器
+
+    同一进程内的所有线程共用一个实例。call() 在发请求前取令牌，遇到 429/5xx
+    或超时时按指数退避加随机抖动重试（遵循 Retry-After）；被限流时整个域名冷却
+    并把速率减半，之后每次成功请求逐步恢复到配置的速率。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = HostRateLimiter()
+            return cls._instance
+
+    def __init__(self, rate=None, burst=None, max_attempts=None, base_delay=1.0, max_delay=60.0):
+        self.rate = rate or float(os.getenv('CRAWL_HOST_RATE', '1.0'))
+        self.burst = burst or float(os.getenv('CRAWL_HOST_BURST', '2'))
+        self.max_attempts = max(1, max_attempts or int(os.getenv('CRAWL_MAX_ATTEMPTS', '4')))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "throttle_seconds": 0.0,
+            "retries": 0,
+            "timeouts": 0,
+            "backoff_seconds": 0.0,
+            "statuses": {},
+        }
+
+    def scale(self, factor):
+        """按比例调整每个域名的速率，用于多个工作进程分摊同一域名的请求速率"""
+        with self._lock:
+            self.rate *= factor
+            for bucket in self._buckets.values():
+                bucket.base_rate *= factor
+                bucket.rate *= factor
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.rate, self.burst)
+        return bucket
+
+    def acquire(self, url):
+        """等待直到该域名有可用令牌，返回等待的秒数"""
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.refill(now)
+            bucket.tokens -= 1
+            wait = max(bucket.cooldown_until - now, -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0)
+            self.stats["requests"] += 1
+            if wait > 0:
+                self.stats["throttled"] += 1
+                self.stats["throttle_seconds"] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """第 attempt 次（从0开始）重试前的等待：指数退避 + 全抖动，不少于 Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _on_throttled(self, url, delay):
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.cooldown_until = max(bucket.cooldown_until, time.monotonic() + delay)
+            bucket.rate = max(bucket.base_rate / 16, bucket.rate / 2)
+        logger.warning("%s 被限流，冷却 %.1f 秒，速率降至 %.2f 次/秒", host, delay, bucket.rate)
+
+    def _on_success(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            if bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate / 20)
+
+    def call(self, url, send):
+        """限速后执行 send()，对可重试的状态码和超时退避重试，返回最后一次的响应"""
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            self.acquire(url)
+            try:
+                response = send()
+            except TIMEOUT_ERRORS as e:
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                if last_attempt:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.info("请求超时，%.1f 秒后重试 (%d/%d) %s: %s", delay, attempt + 1, self.max_attempts, url, e)
+            else:
+                status = _status_of(response)
+                if status is not None:
+                    with self._lock:
+                        self.stats["statuses"][status] = self.stats["statuses"].get(status, 0) + 1
+                if status not in RETRY_STATUSES:
+                    self._on_success(url)
+                    return response
+                if last_attempt:
+                    return response
+                delay = self.backoff_delay(attempt, retry_after_seconds(response))
+                if status in THROTTLE_STATUSES:
+                    self._on_throttled(url, delay)
+                logger.info("响应状态 %s，%.1f 秒后重试 (%d/%d) %s", status, delay, attempt + 1, self.max_attempts, url)
+
+            with self._lock:
+                self.stats["retries"] += 1
+                self.stats["backoff_seconds"] += delay
+            time.sleep(delay)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, statuses=dict(self.stats["statuses"]))
+            stats["host_rates"] = {host: round(bucket.rate, 3) for host, bucket in self._buckets.items()}
+        stats["throttle_seconds"] = round(stats["throttle_seconds"], 2)
+        stats["backoff_seconds"] = round(stats["backoff_seconds"], 2)
+        return stats
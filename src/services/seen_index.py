@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def _file_lock(path):
+    """跨进程的排他文件锁"""
+    with open(path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SeenIndex:
+    """持久化的已抓取条目索引
+
+    按类型（posts / articles）记录条目键（post_id 或文章URL）及其内容哈希，
+    用于增量爬取时判断条目是新增、内容已变化还是已知且未变化。
+    """
+
+    NEW = "new"
+    CHANGED = "changed"
+    UNCHANGED = "unchanged"
+
+    def __init__(self, data_path, filename="seen_index.json"):
+        self.filepath = os.path.join(data_path, filename)
+        self.entries = {"posts": {}, "articles": {}}
+        self._touched = set()
+        for kind, items in self._read().items():
+            self.entries.setdefault(kind, {}).update(items)
+
+    def _read(self):
+        if not os.path.exists(self.filepath):
+            return {}
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"已抓取索引读取失败，将重新建立: {e}")
+            return {}
+
+    @staticmethod
+    def content_hash(content):
+        return hashlib.sha1(content.strip().encode('utf-8')).hexdigest()
+
+    def status(self, kind, key, content=None):
+        """返回条目状态；content 为空时只按键判断"""
+        entry = self.entries.get(kind, {}).get(key)
+        if entry is None:
+            return self.NEW
+        if content is None or entry.get("hash") == self.content_hash(content):
+            return self.UNCHANGED
+        return self.CHANGED
+
+    def is_unchanged(self, kind, key, content=None):
+        return self.status(kind, key, content) == self.UNCHANGED
+
+    def mark(self, kind, key, content=None):
+        """记录条目已抓取"""
+        now = datetime.now().isoformat()
+        entry = self.entries.setdefault(kind, {}).setdefault(key, {"first_seen": now})
+        if content is not None:
+            entry["hash"] = self.content_hash(content)
+        entry["last_seen"] = now
+        self._touched.add(kind)
+
+    def save(self):
+        """只写回本实例修改过的类型，其余类型以磁盘上的为准
+
+        多个爬虫进程可能共用同一索引文件，读取、合并和替换在文件锁内完成。
+        """
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        with _file_lock(self.filepath + ".lock"):
+            data = self._read()
+            for kind in self._touched:
+                data[kind] = self.entries[kind]
+            tmp_path = f"{self.filepath}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.filepath)
@@ -0,0 +1,79 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger("crawl-sources")
+
+TOPIC_URL = "https://coinmarketcap.com/community/topics/{topic}%23/latest/"
+
+# 默认数据源；btc 和 articles 沿用原来的输出文件和已抓取索引
+DEFAULT_SOURCES = [
+    {
+        "name": "btc",
+        "type": "posts",
+        "url": TOPIC_URL.format(topic="BTC%20Price%20Analysis"),
+        "output": "cmc_btc_analysis.jsonl",
+        "seen_index": "seen_index.json",
+    },
+    {
+        "name": "eth",
+        "type": "posts",
+        "url": TOPIC_URL.format(topic="ETH%20Price%20Analysis"),
+    },
+    {
+        "name": "bnb",
+        "type": "posts",
+        "url": TOPIC_URL.format(topic="BNB%20Price%20Analysis"),
+    },
+    {
+        "name": "sol",
+        "type": "posts",
+        "url": TOPIC_URL.format(topic="SOL%20Price%20Analysis"),
+    },
+    {
+        "name": "articles",
+        "type": "articles",
+        "url": "https://coinmarketcap.com/community/articles/",
+        "output": "cmc_articles.jsonl",
+        "seen_index": "seen_index.json",
+    },
+]
+
+# 各数据源合并后的结果，分析器读取这两个文件
+MERGED_FILES = {
+    "posts": "merged_posts.jsonl",
+    "articles": "merged_articles.jsonl",
+}
+
+
+def _with_defaults(source):
+    source = dict(source)
+    if source.get("type") not in MERGED_FILES:
+        raise ValueError(f"Unsupported source type: {source.get('type')}")
+    source.setdefault("output", f"cmc_{source['name']}_{source['type']}.jsonl")
+    source.setdefault("seen_index", f"seen_index_{source['name']}.json")
+    source.setdefault("target_count", 20)
+    source.setdefault("enabled", True)
+    return source
+
+
+def load_sources(path=None, names=None):
+    """读取数据源配置
+
+    path（或 CRAWL_SOURCES_FILE）指向JSON数组时使用文件中的配置，否则使用默认数据源；
+    names（或 CRAWL_SOURCES，逗号分隔）用于只启用其中的部分数据源。
+    """
+    path = path or os.getenv('CRAWL_SOURCES_FILE')
+    sources = DEFAULT_SOURCES
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                sources = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("数据源配置读取失败，使用默认配置: %s", e)
+
+    names = names or [name.strip() for name in os.getenv('CRAWL_SOURCES', '').split(',') if name.strip()]
+    sources = [_with_defaults(source) for source in sources]
+    if names:
+        return [source for source in sources if source["name"] in names]
+    return [source for source in sources if source["enabled"]]
@@ -0,0 +1,153 @@
+import time
+import logging
+from datetime import datetime
+from .dom_extract import POSTS_SCRIPT
+
+logger = logging.getLogger("virtual-list")
+
+# 在页面内安装 MutationObserver：虚拟列表滚动时会卸载离开视口的条目，
+# 因此新挂载的 virtual-item 先进入待提取队列，由 harvest() 批量提取。
+# advance() 滚动到最后一个已挂载条目的实际位置，并等待观察到新条目或超时。
+INSTALL_SCRIPT = """
+(opts) => {
+    if (window.__virtualHarvest) return;
+    const extract = __EXTRACT__;
+    const selector = opts.selector;
+    const state = { seen: new Set(), pending: new Map(), waiters: [] };
+
+    const enqueue = item => {
+        const index = item.getAttribute('data-index');
+        if (index === null || state.seen.has(index)) return false;
+        state.pending.set(index, item);
+        return true;
+    };
+    const notify = () => state.waiters.splice(0).forEach(resolve => resolve());
+
+    const observer = new MutationObserver(mutations => {
+        let added = false;
+        for (const mutation of mutations) {
+            if (mutation.type === 'attributes') {
+                // 复用DOM节点的虚拟列表只会修改 data-index
+                if (mutation.target.matches(selector)) added = enqueue(mutation.target) || added;
+                continue;
+            }
+            mutation.addedNodes.forEach(node => {
+                if (node.nodeType !== 1) return;
+                // 骨架屏条目的内容稍后才插入，按所属条目重新入队
+                const owner = node.closest(selector);
+                if (owner) added = enqueue(owner) || added;
+                node.querySelectorAll(selector).forEach(item => { added = enqueue(item) || added; });
+            });
+        }
+        if (added) notify();
+    });
+    observer.observe(document.body, {
+        childList: true, subtree: true, attributes: true, attributeFilter: ['data-index']
+    });
+    document.querySelectorAll(selector).forEach(enqueue);
+
+    state.harvest = async harvestOpts => {
+        const items = [];
+        for (const [index, item] of state.pending) {
+            if (!state.seen.has(index) && item.isConnected && item.getAttribute('data-index') === index) {
+                items.push(item);
+            }
+        }
+        state.pending.clear();
+        if (!items.length) return [];
+        items.sort((a, b) => Number(a.getAttribute('data-index')) - Number(b.getAttribute('data-index')));
+        const posts = await extract(items, { afterIndex: null, expandTimeout: harvestOpts.expandTimeout });
+        posts.forEach(post => state.seen.add(String(post.index)));
+        return posts;
+    };
+
+    state.advance = async advanceOpts => {
+        let last = null;
+        document.querySelectorAll(selector).forEach(item => {
+            if (!last || Number(item.getAttribute('data-index')) > Number(last.getAttribute('data-index'))) last = item;
+        });
+        const root = document.scrollingElement || document.documentElement;
+        const before = window.scrollY;
+        const target = last ? window.scrollY + last.getBoundingClientRect().top : root.scrollHeight;
+        // 最后一个条目已在视口顶部时至少滚动一屏，触发加载下一页
+        window.scrollTo(0, target > before + 1 ? target : before + window.innerHeight);
+        if (!state.pending.size) {
+            await new Promise(resolve => {
+                state.waiters.push(resolve);
+                setTimeout(resolve, advanceOpts.timeout);
+            });
+        }
+        return {
+            newItems: state.pending.size,
+            moved: window.scrollY !== before,
+            atBottom: window.scrollY + window.innerHeight >= root.scrollHeight - 2
+        };
+    };
+
+    window.__virtualHarvest = state;
+}
+""".replace("__EXTRACT__", POSTS_SCRIPT.strip())
+
+
+class VirtualListHarvester:
+    """虚拟列表帖子采集
+
+    按条目的实际位置滚动，新挂载的条目由页面内的观察者记录并整批提取，
+    每轮只需两次 evaluate；达到目标数量、stop_check 返回真或到达列表末尾时停止。
+    """
+
+    def __init__(self, page, selector="div[data-test='virtual-item']", wait_timeout=5000,
+                 expand_timeout=3000, idle_rounds=3):
+        self.page = page
+        self.selector = selector
+        self.wait_timeout = wait_timeout
+        self.expand_timeout = expand_timeout
+        self.idle_rounds = idle_rounds
+        self.stats = {"rounds": 0, "posts": 0, "end_of_feed": False, "seconds": 0.0}
+
+    def collect(self, target_count, stop_check=None, writer=None):
+        """采集最多 target_count 条帖子；stop_check 只接收本轮新提取的帖子"""
+        started = time.monotonic()
+        self.page.evaluate(INSTALL_SCRIPT, {"selector": self.selector})
+        posts = []
+        idle = 0
+
+        while True:
+            batch = self.page.evaluate(
+                "opts => window.__virtualHarvest.harvest(opts)",
+                {"expandTimeout": self.expand_timeout}
+            )
+            crawl_time = datetime.now().isoformat()
+            batch = batch[:target_count - len(posts)]
+            for post in batch:
+                post["crawl_time"] = crawl_time
+            posts.extend(batch)
+            if writer:
+                writer.extend(batch)
+            self.stats["rounds"] += 1
+            if batch:
+                logger.debug("提取了 %d 条帖子，共 %d 条 (最后索引: %s)", len(batch), len(posts), batch[-1]["index"])
+
+            if len(posts) >= target_count or (stop_check and batch and stop_check(batch)):
+                break
+
+            result = self.page.evaluate(
+                "opts => window.__virtualHarvest.advance(opts)",
+                {"timeout": self.wait_timeout}
+            )
+            if result["newItems"]:
+                idle = 0
+                continue
+            # 没有新条目：已到底部且无法继续滚动时立即结束，否则再等待几轮加载
+            idle += 1
+            if (result["atBottom"] and not result["moved"]) or idle >= self.idle_rounds:
+                self.stats["end_of_feed"] = True
+                print("没有更多内容可加载")
+                break
+
+        self.stats["posts"] += len(posts)
+        self.stats["seconds"] += time.monotonic() - started
+        return posts
+
+    def get_stats(self):
+        return dict(self.stats)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services import prompt_builder
+from services.prompt_builder import PromptBuilder, count_tokens
+
+
+class _OfflineTiktoken:
+    """模拟离线环境：加载分词器时需要下载BPE文件，失败抛出网络错误"""
+
+    def __init__(self):
+        self.loads = 0
+
+    def encoding_for_model(self, model):
+        self.loads += 1
+        raise OSError("network is unreachable")
+
+    def get_encoding(self, name):
+        self.loads += 1
+        raise OSError("network is unreachable")
+
+
+def test_count_tokens_falls_back_when_tokenizer_cannot_load(monkeypatch):
+    offline = _OfflineTiktoken()
+    monkeypatch.setattr(prompt_builder, "tiktoken", offline)
+    monkeypatch.setattr(prompt_builder, "_encodings", {})
+
+    # 中日韩字符按1个、其他字符按4个1个token估算
+    assert count_tokens("比特币上涨", "gpt-4o") == 5
+    assert count_tokens("abcdefgh", "gpt-4o") == 2
+    # 加载失败的结果被缓存，不会每次调用都重新下载
+    assert offline.loads == 1
+
+
+def test_prompt_builder_fits_with_estimate_when_tokenizer_cannot_load(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "tiktoken", _OfflineTiktoken())
+    monkeypatch.setattr(prompt_builder, "_encodings", {})
+
+    articles = [{"title": f"文章{i}", "content": "市场" * 500} for i in range(5)]
+    text, stats = PromptBuilder("gpt-4o", budget=1000).fit(articles, "articles")
+
+    assert stats["tokenizer"] == "estimate"
+    assert stats["included"] > 0
+    assert stats["tokens"] <= 1000
+    assert text